@@ -1,22 +1,63 @@
+from sqlalchemy import or_, select
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import Session
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from typing import Optional
 import pandas as pd
+import gzip
+import json
+import multiprocessing
 import os
 import shutil
+import sqlite3
+import time
 import models
+from database import SQLALCHEMY_DATABASE_URL, SessionLocal
 
 # Base directory for all exports (mounted from host via Docker)
 # Inside container: /data -> Host: C:\RetailInventoryData
 EXPORT_BASE_DIR = "/data"
 
-def get_sales_export_path_for_today():
+# "xlsx" (default, opens in Excel) or "parquet" (much faster to write and
+# read, and several times smaller; needs pyarrow)
+BACKUP_FORMAT = os.getenv("BACKUP_FORMAT", "xlsx").lower()
+
+# "export": per-table xlsx/parquet files (run_daily_backup)
+# "snapshot": compressed, verified copy of the SQLite database (snapshot_database)
+# "both": snapshot, then export
+BACKUP_MODE = os.getenv("BACKUP_MODE", "export").lower()
+
+def write_frame(df: pd.DataFrame, folder: str, name: str) -> str:
+    """
+    Save `df` as `name` in the configured backup format; returns the file path.
+    Written under a temporary name and renamed, so a crash never leaves a
+    half-written file in place of the previous one.
+    """
+    path = os.path.join(folder, f"{name}.{BACKUP_FORMAT}")
+    partial = os.path.join(folder, f".{name}.{os.getpid()}.partial.{BACKUP_FORMAT}")
+    try:
+        if BACKUP_FORMAT == "parquet":
+            df.to_parquet(partial, index=False)
+        else:
+            df.to_excel(partial, index=False)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return path
+
+def read_frame(path: str) -> pd.DataFrame:
+    return pd.read_parquet(path) if path.endswith(".parquet") else pd.read_excel(path)
+
+def get_sales_export_path_for_today(sales_root: Optional[str] = None):
     """Get the export directory path for today's sales: exports/sales/YEAR/MONTH/DAY/"""
     now = datetime.now()
     year = str(now.year)
     month = f"{now.month:02d}"
     day = f"{now.day:02d}"
     
-    path = os.path.join(EXPORT_BASE_DIR, "exports", "sales", year, month, day)
+    path = os.path.join(sales_root or os.path.join(EXPORT_BASE_DIR, "exports", "sales"), year, month, day)
     os.makedirs(path, exist_ok=True)
     return path
 
@@ -26,80 +67,394 @@ def get_master_data_path():
     os.makedirs(path, exist_ok=True)
     return path
 
-def run_daily_backup(db: Session):
+# Worker processes for run_daily_backup; 1 runs every table in this process
+BACKUP_WORKERS = int(os.getenv("BACKUP_WORKERS", str(os.cpu_count() or 1)))
+
+# Master data file -> (model, columns, row filter)
+MASTER_TABLES = {
+    "inventory": (models.Trophy, ("id", "name", "sku", "category", "material", "quantity",
+                                  "cost_price", "selling_price", "min_stock_level"), None),
+    "customers": (models.Customer, ("id", "name", "mobile", "current_balance"), None),
+    "vendors": (models.Vendor, ("id", "name", "address", "mobile", "email"), None),
+    "purchases": (models.Purchase, ("id", "timestamp", "vendor_id", "invoice_number", "total_amount"),
+                  models.Purchase.is_active == True),
+}
+
+def export_master_table(name: str, folder: str) -> str:
+    """Write one master data file. Runs in a worker process, on its own connection."""
+    model, columns, criteria = MASTER_TABLES[name]
+    query = select(*(getattr(model, c) for c in columns)).order_by(model.id)
+    if criteria is not None:
+        query = query.where(criteria)
+    db = SessionLocal()
+    try:
+        df = pd.DataFrame(db.execute(query).all(), columns=list(columns))
+    finally:
+        db.close()
+    return write_frame(df, folder, name)
+
+def backup_sales_task(sales_root: str) -> list:
+    db = SessionLocal()
+    try:
+        return backup_sales(db, sales_root)
+    finally:
+        db.close()
+
+def _run_parallel(tasks):
+    """Run [(function, args)] on a process pool (or inline with one worker); results in order."""
+    workers = min(BACKUP_WORKERS, len(tasks))
+    if workers <= 1:
+        return [function(*args) for function, args in tasks]
+    # spawn, not fork: the server process has running threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(function, *args) for function, args in tasks]
+        return [future.result() for future in futures]
+
+def run_daily_backup():
     """
-    Run the daily backup:
+    Run the daily backup, each table in its own worker process (BACKUP_WORKERS):
     1. Master data (Inventory, Customers, Vendors, Purchases) - overwrite in /exports/master/
-    2. Sales - save in date hierarchy /exports/sales/YYYY/MM/DD/
+    2. Sales - new/changed sales and their items since the last run, in date
+       hierarchy /exports/sales/YYYY/MM/DD/ (see backup_sales)
     3. Clean up sales exports older than 10 years
     """
     print(f"[Backup] Starting daily backup at {datetime.now()}")
     
     try:
-        # === MASTER DATA (Overwrite daily) ===
         master_path = get_master_data_path()
-        
-        # Export Inventory
-        inventory_items = db.query(models.Trophy).all()
-        inv_data = [{
-            "id": i.id, "name": i.name, "sku": i.sku,
-            "category": i.category, "material": i.material,
-            "quantity": i.quantity, "cost_price": i.cost_price,
-            "selling_price": i.selling_price, "min_stock_level": i.min_stock_level
-        } for i in inventory_items]
-        pd.DataFrame(inv_data).to_excel(os.path.join(master_path, "inventory.xlsx"), index=False)
-        
-        # Export Customers
-        customers = db.query(models.Customer).all()
-        customer_data = [{
-            "id": c.id, "name": c.name, "mobile": c.mobile,
-            "current_balance": c.current_balance
-        } for c in customers]
-        pd.DataFrame(customer_data).to_excel(os.path.join(master_path, "customers.xlsx"), index=False)
-        
-        # Export Vendors
-        vendors = db.query(models.Vendor).all()
-        vendor_data = [{
-            "id": v.id, "name": v.name, "address": v.address,
-            "mobile": v.mobile, "email": v.email
-        } for v in vendors]
-        pd.DataFrame(vendor_data).to_excel(os.path.join(master_path, "vendors.xlsx"), index=False)
-        
-        # Export Purchases
-        purchases = db.query(models.Purchase).filter(models.Purchase.is_active == True).all()
-        purchase_data = [{
-            "id": p.id, "timestamp": p.timestamp, "vendor_id": p.vendor_id,
-            "invoice_number": p.invoice_number, "total_amount": p.total_amount
-        } for p in purchases]
-        pd.DataFrame(purchase_data).to_excel(os.path.join(master_path, "purchases.xlsx"), index=False)
-        
+        sales_root = get_sales_root()
+        # Sales go first: with a new base to write they are the longest task
+        results = _run_parallel(
+            [(backup_sales_task, (sales_root,))] +
+            [(export_master_table, (name, master_path)) for name in MASTER_TABLES]
+        )
+        sales_files, master_files = results[0], results[1:]
         print(f"[Backup] Master data saved to {master_path}")
-        
-        # === SALES (Date hierarchy) ===
-        sales_path = get_sales_export_path_for_today()
-        timestamp = datetime.now().strftime("%H%M%S")
-        
-        sales = db.query(models.Sale).all()
-        sales_data = [{
-            "id": s.id, "timestamp": s.timestamp, "customer_name": s.customer_name,
-            "customer_id": s.customer_id, "invoice_number": s.invoice_number, 
-            "total_amount": s.total_amount, "total_profit": s.total_profit, 
-            "payment_status": s.payment_status
-        } for s in sales]
-        
-        sales_file = os.path.join(sales_path, f"sales_{timestamp}.xlsx")
-        pd.DataFrame(sales_data).to_excel(sales_file, index=False)
-        print(f"[Backup] Sales saved to {sales_file}")
+        sales_file = sales_files[0] if sales_files else None
+        print(f"[Backup] Sales saved to {sales_file}" if sales_file else "[Backup] No sales changes since last backup")
         
         # Cleanup old sales exports (older than 10 years)
         cleanup_old_sales_exports()
         
-        return {"status": "success", "master_path": master_path, "sales_file": sales_file}
+        return {
+            "status": "success", "master_path": master_path, "sales_file": sales_file,
+            "size_bytes": sum(os.path.getsize(path) for path in master_files + sales_files),
+        }
     
     except Exception as e:
         print(f"[Backup] ERROR: {str(e)}")
         return {"status": "error", "message": str(e)}
 
+def run_backup():
+    """Run the backups selected by BACKUP_MODE; the result merges theirs."""
+    result = {"status": "success", "size_bytes": 0}
+    steps = []
+    if BACKUP_MODE in ("snapshot", "both"):
+        steps.append(snapshot_database)
+    if BACKUP_MODE in ("export", "both"):
+        steps.append(run_daily_backup)
+    for step in steps:
+        outcome = step()
+        size = result["size_bytes"] + outcome.pop("size_bytes", 0)
+        result.update(outcome, size_bytes=size)
+        if outcome["status"] != "success":
+            break
+    return result
+
+# === Incremental sales backup ===
+# exports/sales/manifest.json names a base snapshot (sales + sale items) and
+# the deltas written after it, each holding the sales created or changed
+# (Sale.updated_at) since the previous run plus the ids of deleted sales
+# (SaleDeletion). The high-water mark (time of the last read, largest sale id
+# and tombstone id seen) is stored with them. Every BACKUP_COMPACT_AFTER deltas, replay_sales
+# merges base + deltas into a new base. Paths in the manifest are relative to
+# the sales folder, which is mounted at different paths in and out of Docker.
+
+BACKUP_COMPACT_AFTER = int(os.getenv("BACKUP_COMPACT_AFTER", "7"))
+# Re-read sales changed shortly before the previous run read, in case their
+# transaction committed after it
+DELTA_OVERLAP = timedelta(seconds=int(os.getenv("BACKUP_DELTA_OVERLAP_SECONDS", "300")))
+
+SALE_COLUMNS = (
+    "id", "timestamp", "customer_id", "customer_name", "invoice_number", "gstin",
+    "total_amount", "tax_amount", "total_profit", "payment_status", "paid_amount", "updated_at",
+)
+SALE_ITEM_COLUMNS = ("id", "sale_id", "trophy_id", "quantity", "unit_price_at_sale", "unit_cost_at_sale")
+
+def get_sales_root():
+    path = os.path.join(EXPORT_BASE_DIR, "exports", "sales")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def load_manifest(sales_root: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(sales_root, "manifest.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _save_manifest(sales_root: str, manifest: dict):
+    # Replaced atomically: the manifest only ever names completely written files
+    path = os.path.join(sales_root, "manifest.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def _sales_frames(db: Session, criteria=None):
+    sale, item = models.Sale, models.SaleItem
+    sales_query = select(*(getattr(sale, c) for c in SALE_COLUMNS)).order_by(sale.id)
+    items_query = select(*(getattr(item, c) for c in SALE_ITEM_COLUMNS)).order_by(item.id)
+    if criteria is not None:
+        sales_query = sales_query.where(criteria)
+        items_query = items_query.where(item.sale_id.in_(select(sale.id).where(criteria)))
+    sales = pd.DataFrame(db.execute(sales_query).all(), columns=list(SALE_COLUMNS))
+    items = pd.DataFrame(db.execute(items_query).all(), columns=list(SALE_ITEM_COLUMNS))
+    return sales, items
+
+def _high_water(read_at: datetime, sales: pd.DataFrame, deleted_through: int, previous: Optional[dict] = None) -> dict:
+    previous = previous or {"sale_id": 0, "deletion_id": 0}
+    return {
+        # Same clock as Sale.updated_at; the next run reads changes after it
+        "updated_at": read_at.isoformat(),
+        "sale_id": max(previous["sale_id"], int(sales["id"].max()) if not sales.empty else 0),
+        "deletion_id": max(previous["deletion_id"], deleted_through),
+    }
+
+def _relative(sales_root: str, path: str) -> str:
+    return os.path.relpath(path, sales_root).replace(os.sep, "/")
+
+def _remove_files(sales_root: str, entries):
+    for entry in entries:
+        for key in ("sales", "items"):
+            try:
+                os.remove(os.path.join(sales_root, entry[key]))
+            except OSError:
+                pass
+
+def _write_base(sales_root: str, sales: pd.DataFrame, items: pd.DataFrame, high_water: dict, old: Optional[dict]):
+    """Make (sales, items) the new base, dropping the previous base and its deltas."""
+    folder = os.path.join(sales_root, "base")
+    os.makedirs(folder, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    files = [write_frame(sales, folder, f"sales_{stamp}"), write_frame(items, folder, f"sale_items_{stamp}")]
+    _save_manifest(sales_root, {
+        "base": {"sales": _relative(sales_root, files[0]), "items": _relative(sales_root, files[1]),
+                 "rows": len(sales), "created_at": datetime.now().isoformat(timespec="seconds")},
+        "deltas": [],
+        "high_water": high_water,
+    })
+    if old is not None:
+        _remove_files(sales_root, [old["base"], *old["deltas"]])
+    return files
+
+def backup_sales(db: Session, sales_root: str) -> list:
+    """
+    Write the sales changed since the last run as a delta (the first run
+    writes a full base). Returns the files written, sales file first.
+    """
+    read_at = datetime.utcnow()
+    # Deletions are read first: a sale deleted mid-backup then at worst has a
+    # tombstone for a row this run never saw, never a missed tombstone
+    deleted = db.execute(
+        select(models.SaleDeletion.id, models.SaleDeletion.sale_id).order_by(models.SaleDeletion.id)
+    ).all()
+    manifest = load_manifest(sales_root)
+    if manifest is None:
+        deleted_through = deleted[-1][0] if deleted else 0
+        sales, items = _sales_frames(db)
+        return _write_base(sales_root, sales, items, _high_water(read_at, sales, deleted_through), None)
+
+    previous = manifest["high_water"]
+    deleted = [(tomb_id, sale_id) for tomb_id, sale_id in deleted if tomb_id > previous["deletion_id"]]
+    since = datetime.fromisoformat(previous["updated_at"]) - DELTA_OVERLAP
+    # New ids are checked too: rows inserted with raw SQL have no updated_at
+    criteria = or_(models.Sale.id > previous["sale_id"], models.Sale.updated_at > since)
+    sales, items = _sales_frames(db, criteria)
+    if sales.empty and not deleted:
+        return []
+
+    folder = get_sales_export_path_for_today(sales_root)
+    stamp = datetime.now().strftime("%H%M%S")
+    files = [write_frame(sales, folder, f"sales_delta_{stamp}"), write_frame(items, folder, f"sale_items_delta_{stamp}")]
+    manifest["deltas"].append({
+        "sales": _relative(sales_root, files[0]), "items": _relative(sales_root, files[1]),
+        "deleted": [sale_id for _, sale_id in deleted], "rows": len(sales),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    })
+    manifest["high_water"] = _high_water(read_at, sales, deleted[-1][0] if deleted else 0, previous)
+    _save_manifest(sales_root, manifest)
+
+    if len(manifest["deltas"]) >= BACKUP_COMPACT_AFTER:
+        files += compact_sales(db, sales_root)
+    return files
+
+def replay_sales(sales_root: str):
+    """(sales, items) as of the last backup: the base with every delta applied in order."""
+    manifest = load_manifest(sales_root)
+    if manifest is None:
+        raise FileNotFoundError(f"No sales backup manifest in {sales_root}")
+    sales = read_frame(os.path.join(sales_root, manifest["base"]["sales"]))
+    items = read_frame(os.path.join(sales_root, manifest["base"]["items"]))
+    for delta in manifest["deltas"]:
+        delta_sales = read_frame(os.path.join(sales_root, delta["sales"]))
+        delta_items = read_frame(os.path.join(sales_root, delta["items"]))
+        # A sale in a delta replaces the earlier copy and all of its items
+        replaced = set(delta_sales["id"]) | set(delta["deleted"])
+        sales = pd.concat([sales[~sales["id"].isin(replaced)], delta_sales], ignore_index=True)
+        items = pd.concat([items[~items["sale_id"].isin(replaced)], delta_items], ignore_index=True)
+    return sales.sort_values("id", ignore_index=True), items.sort_values("id", ignore_index=True)
+
+def compact_sales(db: Session, sales_root: str) -> list:
+    """Merge base + deltas into a new base and drop tombstones it no longer needs."""
+    manifest = load_manifest(sales_root)
+    sales, items = replay_sales(sales_root)
+    files = _write_base(sales_root, sales, items, manifest["high_water"], manifest)
+    db.query(models.SaleDeletion).filter(
+        models.SaleDeletion.id <= manifest["high_water"]["deletion_id"]
+    ).delete(synchronize_session=False)
+    db.commit()
+    print(f"[Backup] Compacted {len(manifest['deltas'])} sales deltas into {files[0]}")
+    return files
+
+# === Database snapshots ===
+# Lossless backup of the whole SQLite file (every table and column, ids
+# intact) with the online backup API, for disaster recovery. The copy is
+# taken page by page, releasing the database between steps so writers are
+# not held up, checked with PRAGMA integrity_check, then compressed with zstd
+# (zstandard package) or gzip. restore_snapshot() puts one back.
+
+# Pages copied per step. With a rollback journal the database is only locked
+# during a step, but a write from another connection restarts the copy.
+SNAPSHOT_PAGES = int(os.getenv("BACKUP_SNAPSHOT_PAGES", "1024"))
+SNAPSHOT_KEEP = int(os.getenv("BACKUP_SNAPSHOT_KEEP", "14"))
+SNAPSHOT_COMPRESSION = os.getenv("BACKUP_SNAPSHOT_COMPRESSION", "zstd").lower()
+SNAPSHOT_EXTENSIONS = (".db.zst", ".db.gz")
+
+def get_snapshot_path():
+    path = os.path.join(EXPORT_BASE_DIR, "exports", "snapshots")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def sqlite_database_path(url: str = SQLALCHEMY_DATABASE_URL) -> Optional[str]:
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        return None
+    return parsed.database
+
+def _open_compressed(path: str, mode: str, zstd: bool):
+    if zstd:
+        import zstandard
+        if mode == "w":
+            return zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(open(path, "wb"), closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return gzip.open(path, mode + "b", compresslevel=6)
+
+def _snapshot_extension() -> str:
+    if SNAPSHOT_COMPRESSION == "zstd":
+        try:
+            import zstandard  # noqa: F401
+            return ".db.zst"
+        except ImportError:
+            print("[Backup] zstandard not installed, compressing snapshot with gzip")
+    return ".db.gz"
+
+def check_integrity(path: str):
+    conn = sqlite3.connect(path)
+    try:
+        problems = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+    if problems != ["ok"]:
+        raise ValueError(f"Integrity check failed for {path}: {'; '.join(problems[:5])}")
+
+def snapshot_database(db_path: Optional[str] = None) -> dict:
+    """Write a verified, compressed snapshot of the SQLite database to exports/snapshots/."""
+    db_path = db_path or sqlite_database_path()
+    if db_path is None:
+        return {"status": "error", "message": "Snapshots need a SQLite database; use pg_dump for PostgreSQL"}
+    if not os.path.exists(db_path):
+        return {"status": "error", "message": f"Database not found at {db_path}"}
+
+    folder = get_snapshot_path()
+    name = f"inventory_{datetime.now():%Y%m%d_%H%M%S}"
+    raw = os.path.join(folder, name + ".db.partial")
+    final = os.path.join(folder, name + _snapshot_extension())
+    start = time.perf_counter()
+    try:
+        source, target = sqlite3.connect(db_path), sqlite3.connect(raw)
+        try:
+            if source.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+                # Pin one read snapshot for the whole copy: under WAL writers
+                # carry on, and their commits no longer restart the copy
+                source.execute("BEGIN")
+                source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+            source.backup(target, pages=SNAPSHOT_PAGES, sleep=0.001)
+        finally:
+            target.close()
+            source.close()
+        check_integrity(raw)
+
+        with open(raw, "rb") as src, _open_compressed(final + ".tmp", "w", final.endswith(".zst")) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(final + ".tmp", final)
+    except Exception as e:
+        print(f"[Backup] Snapshot failed: {e}")
+        if os.path.exists(final + ".tmp"):
+            os.remove(final + ".tmp")
+        return {"status": "error", "message": str(e)}
+    finally:
+        if os.path.exists(raw):
+            os.remove(raw)
+
+    prune_snapshots(folder)
+    print(f"[Backup] Snapshot saved to {final} in {time.perf_counter() - start:.1f}s")
+    return {"status": "success", "snapshot_file": final, "size_bytes": os.path.getsize(final)}
+
+def list_snapshots(folder: str) -> list:
+    """Snapshot files in `folder`, oldest first."""
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.startswith("inventory_") and name.endswith(SNAPSHOT_EXTENSIONS)
+    )
+
+def prune_snapshots(folder: str, keep: int = SNAPSHOT_KEEP):
+    for path in list_snapshots(folder)[:-keep]:
+        os.remove(path)
+
+def restore_snapshot(snapshot: str, db_path: Optional[str] = None) -> str:
+    """
+    Replace the SQLite database with `snapshot`. The server must be stopped.
+    The snapshot is decompressed and verified beside the database first, and
+    the current database is kept as <name>.pre-restore. Returns the database path.
+    """
+    db_path = db_path or sqlite_database_path()
+    if db_path is None:
+        raise ValueError("Snapshots can only be restored into a SQLite database")
+
+    staged = db_path + ".restoring"
+    with _open_compressed(snapshot, "r", snapshot.endswith(".zst")) as src, open(staged, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    try:
+        check_integrity(staged)
+    except Exception:
+        os.remove(staged)
+        raise
+
+    if os.path.exists(db_path):
+        # Checkpoint the WAL so the kept copy is complete on its own
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+        os.replace(db_path, db_path + ".pre-restore")
+    # A WAL left beside the new file would be replayed into it
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    os.replace(staged, db_path)
+    return db_path
+
 def cleanup_old_sales_exports():
     """Delete sales export folders older than 10 years"""
     sales_base = os.path.join(EXPORT_BASE_DIR, "exports", "sales")
@@ -0,0 +1,139 @@
+"""
+Benchmark: AI provider call latency, client per call vs the shared client.
+
+Starts a stub chat-completions provider (a tiny ASGI app) under uvicorn on
+127.0.0.1 with a throwaway self-signed TLS certificate, so each new
+connection pays a real TCP + TLS handshake, then times completions:
+
+- per-call: a new httpx.AsyncClient for every completion (previous code)
+- pooled: AIService's long-lived client (kept-alive connections)
+
+The stub answers immediately, so the numbers are pure connection and
+protocol overhead; against a remote provider every handshake also costs
+extra round trips.
+
+Usage: python bench_ai_client.py [calls] [--plain]
+"""
+import asyncio
+import datetime
+import ipaddress
+import json
+import os
+import socket
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+COMPLETION = json.dumps({
+    "id": "chatcmpl-bench", "object": "chat.completion", "model": "stub",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "Stock up on gold cups."},
+                 "finish_reason": "stop"}],
+}).encode()
+
+async def stub_provider(scope, receive, send):
+    """Minimal POST /v1/chat/completions."""
+    if scope["type"] == "lifespan":
+        while (await receive())["type"] != "lifespan.shutdown":
+            await send({"type": "lifespan.startup.complete"})
+        await send({"type": "lifespan.shutdown.complete"})
+        return
+    while (await receive()).get("more_body"):
+        pass
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": COMPLETION})
+
+def self_signed_cert(folder: str):
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(minutes=1)).not_valid_after(now + datetime.timedelta(days=1))
+            .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), False)
+            .add_extension(x509.BasicConstraints(ca=True, path_length=None), True)
+            .sign(key, hashes.SHA256()))
+    cert_path, key_path = os.path.join(folder, "stub.crt"), os.path.join(folder, "stub.key")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                  serialization.NoEncryption()))
+    return cert_path, key_path
+
+def start_stub(tls: bool):
+    import uvicorn
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    cert_path = key_path = None
+    if tls:
+        cert_path, key_path = self_signed_cert(tempfile.mkdtemp())
+    config = uvicorn.Config(stub_provider, host="127.0.0.1", port=port, log_level="warning",
+                            ssl_certfile=cert_path, ssl_keyfile=key_path)
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    scheme = "https" if tls else "http"
+    return server, f"{scheme}://127.0.0.1:{port}/v1/chat/completions", cert_path
+
+async def measure(calls: int, url: str, verify):
+    import httpx
+    from services.ai_service import AIService
+
+    service = AIService()
+    service.api_key, service.base_url = "bench", url
+    messages = [{"role": "user", "content": "Give me one insight about trophy sales."}]
+
+    async def per_call():
+        # The previous _call_provider
+        async with httpx.AsyncClient(timeout=30.0, verify=verify) as client:
+            response = await client.post(url, json={"model": "stub", "messages": messages, "stream": False})
+            response.raise_for_status()
+            return response.json()["choices"][0]["message"]["content"]
+
+    async def pooled():
+        return await service._call_provider(messages)
+
+    await service.start(verify=verify)
+    results = {}
+    for mode, call in (("per-call", per_call), ("pooled", pooled)):
+        await call()  # warm-up
+        latencies = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(calls)))
+        results[mode] = (latencies, calls / (time.perf_counter() - start))
+    http_version = (await service.client.post(url, json={"messages": messages})).http_version
+    await service.aclose()
+    return results, http_version
+
+def run(calls: int, tls: bool):
+    server, url, cert_path = start_stub(tls)
+    verify = ssl.create_default_context(cafile=cert_path) if tls else True
+    try:
+        results, http_version = asyncio.run(measure(calls, url, verify))
+    finally:
+        server.should_exit = True
+    print(f"{calls} completions against {url} (shared client speaks {http_version})")
+    print(f"{'mode':>9} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'concurrent/s':>13}")
+    for mode, (latencies, rate) in results.items():
+        latencies.sort()
+        print(f"{mode:>9} {statistics.mean(latencies) * 1000:>8.2f} {latencies[len(latencies) // 2] * 1000:>8.2f} "
+              f"{latencies[int(len(latencies) * 0.95)] * 1000:>8.2f} {rate:>13.1f}")
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    run(int(args[0]) if args else 200, tls="--plain" not in sys.argv)
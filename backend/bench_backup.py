@@ -0,0 +1,67 @@
+"""
+Benchmark: daily backup wall time, serial vs one worker process per table.
+
+Seeds a throwaway SQLite file with N rows in each backed-up table (sales
+with one item each), then runs run_daily_backup in a fresh subprocess per
+worker count. Each run starts from an empty export folder, so the sales
+task writes a full base like the first backup does.
+
+Usage: python bench_backup.py [rows] [workers ...]   (default: 1 and cpu count)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def seed(rows: int):
+    import models
+    from database import engine
+    models.Base.metadata.create_all(bind=engine)
+    start = datetime(2023, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(models.Trophy.__table__.insert(), [{
+            "owner_id": 1, "name": f"Trophy {i}", "sku": f"SKU{i:07d}", "category": "Cups", "material": "Metal",
+            "quantity": i % 100, "cost_price": 10.0, "selling_price": 25.0, "min_stock_level": 5,
+        } for i in range(rows)])
+        conn.execute(models.Customer.__table__.insert(), [{
+            "owner_id": 1, "name": f"Customer {i}", "mobile": f"98{i:08d}", "current_balance": 0.0,
+        } for i in range(rows)])
+        conn.execute(models.Vendor.__table__.insert(), [{
+            "owner_id": 1, "name": f"Vendor {i}", "address": "Main Road", "mobile": f"97{i:08d}",
+        } for i in range(rows)])
+        conn.execute(models.Purchase.__table__.insert(), [{
+            "owner_id": 1, "timestamp": start + timedelta(minutes=i), "vendor_id": i % rows + 1,
+            "invoice_number": f"PINV-{i:08d}", "total_amount": 500.0, "is_active": True,
+        } for i in range(rows)])
+        conn.execute(models.Sale.__table__.insert(), [{
+            "owner_id": 1, "timestamp": start + timedelta(minutes=i), "customer_name": f"Customer {i % 900}",
+            "invoice_number": f"INV-{i:08d}", "total_amount": 100.0, "total_profit": 20.0, "paid_amount": 100.0,
+        } for i in range(rows)])
+        conn.execute(models.SaleItem.__table__.insert(), [{
+            "sale_id": i + 1, "trophy_id": i % rows + 1, "quantity": 1, "unit_price_at_sale": 100.0,
+            "unit_cost_at_sale": 80.0,
+        } for i in range(rows)])
+
+def child():
+    import backup_service
+    backup_service.EXPORT_BASE_DIR = tempfile.mkdtemp()
+    start = time.perf_counter()
+    result = backup_service.run_daily_backup()
+    assert result["status"] == "success", result
+    print(f"{backup_service.BACKUP_WORKERS:>8} {time.perf_counter() - start:>10.2f} {result['size_bytes'] / 1e6:>8.1f}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child()
+    else:
+        rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+        workers = sys.argv[2:] or ["1", str(os.cpu_count() or 1)]
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'backup.db')}"
+        seed(rows)
+        print(f"{rows} rows per table, format {os.getenv('BACKUP_FORMAT', 'xlsx')}, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'wall s':>10} {'MB':>8}")
+        for count in workers:
+            subprocess.run([sys.executable, __file__, "--child"], check=True,
+                           env={**os.environ, "BACKUP_WORKERS": count})
@@ -0,0 +1,69 @@
+"""
+Benchmark: daily sales backup file formats.
+
+Builds the same sales frame run_daily_backup writes (N rows) and times
+writing it, reading it back, and the file size, for:
+
+- xlsx: the current backup format (pandas + openpyxl)
+- parquet: BACKUP_FORMAT=parquet (pyarrow, snappy)
+- arrow: Arrow IPC file (uncompressed, memory-mappable)
+
+Usage: python bench_columnar.py [rows] [format ...]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+
+FORMATS = ["parquet", "arrow", "xlsx"]
+
+def sales_frame(rows: int) -> pd.DataFrame:
+    start = datetime(2023, 1, 1)
+    return pd.DataFrame({
+        "id": range(1, rows + 1),
+        "timestamp": [start + timedelta(minutes=i) for i in range(rows)],
+        "customer_name": [f"Customer {i % 900}" for i in range(rows)],
+        "customer_id": [i % 900 + 1 for i in range(rows)],
+        "invoice_number": [f"INV-{i:08d}" for i in range(rows)],
+        "total_amount": [100.0 + i % 50 for i in range(rows)],
+        "total_profit": [20.0 + i % 7 for i in range(rows)],
+        "payment_status": ["Paid" if i % 5 else "Due" for i in range(rows)],
+    })
+
+def write(df: pd.DataFrame, fmt: str, path: str):
+    if fmt == "xlsx":
+        df.to_excel(path, index=False)
+    elif fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_feather(path, compression="uncompressed")
+
+def read(fmt: str, path: str) -> pd.DataFrame:
+    if fmt == "xlsx":
+        return pd.read_excel(path)
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    return pd.read_feather(path)
+
+def run(rows: int, formats):
+    df = sales_frame(rows)
+    folder = tempfile.mkdtemp()
+    print(f"{rows} sales rows")
+    print(f"{'format':>8} {'write s':>9} {'read s':>9} {'MB':>8}")
+    for fmt in formats:
+        path = os.path.join(folder, f"sales.{fmt}")
+        start = time.perf_counter()
+        write(df, fmt, path)
+        written = time.perf_counter() - start
+        start = time.perf_counter()
+        back = read(fmt, path)
+        elapsed = time.perf_counter() - start
+        assert len(back) == rows
+        print(f"{fmt:>8} {written:>9.2f} {elapsed:>9.2f} {os.path.getsize(path) / 1e6:>8.1f}")
+        os.remove(path)
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    run(rows, sys.argv[2:] or FORMATS)
@@ -0,0 +1,73 @@
+"""
+Benchmark: POST /sales/ latency as the number of lines on a bill grows.
+
+Runs against a throwaway SQLite file so the real inventory.db is never touched.
+Usage: python bench_create_sale.py [repeats]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import get_db
+from routers import sales
+from routers.auth import get_current_user
+
+LINE_COUNTS = [1, 5, 10, 30, 50, 80]
+
+def run(repeats=20):
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+    db = Session()
+    user = models.User(username="bench", hashed_password="x", role="user")
+    db.add(user)
+    db.flush()
+    db.add_all([
+        models.Trophy(owner_id=user.id, name=f"Item {i}", sku=f"BENCH-{i}", quantity=10_000_000,
+                      cost_price=50.0, selling_price=80.0)
+        for i in range(max(LINE_COUNTS))
+    ])
+    db.commit()
+    trophy_ids = [t.id for t in db.query(models.Trophy.id).order_by(models.Trophy.id)]
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+
+    def override_get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(sales.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    client = TestClient(app)
+
+    print(f"{'lines':>6} {'mean ms':>10} {'ms/line':>10}")
+    for lines in LINE_COUNTS:
+        payload = {
+            "customer_name": "Bench Customer",
+            "items": [{"trophy_id": tid, "quantity": 1} for tid in trophy_ids[:lines]]
+        }
+        client.post("/sales/", json=payload)  # warm-up
+        start = time.perf_counter()
+        for _ in range(repeats):
+            response = client.post("/sales/", json=payload)
+            assert response.status_code == 200, response.text
+        mean_ms = (time.perf_counter() - start) * 1000 / repeats
+        print(f"{lines:>6} {mean_ms:>10.2f} {mean_ms / lines:>10.3f}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,106 @@
+"""
+Micro-benchmark: /analytics/dashboard aggregation on a large sales table.
+
+Compares the previous five-query dashboard (count, revenue and profit as
+separate scans) with the current router implementation on a throwaway
+SQLite file. The analytics cache is cleared before each timed call; the
+cache-hit cost is reported separately.
+Usage: python bench_dashboard.py [sales_rows] [repeats]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import create_db_engine, start_query_count
+from routers.analytics import get_dashboard_stats
+from services import rollup_service
+from services.cache_service import analytics_cache
+
+def seed(engine, rows):
+    models.Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO users (id, username, hashed_password, role, is_active) VALUES (1, 'bench', 'x', 'user', 1)")
+        conn.exec_driver_sql(
+            "INSERT INTO trophies (owner_id, name, sku, quantity, cost_price, selling_price, version) VALUES (?, ?, ?, ?, ?, ?, 0)",
+            [(1, f"Item {i}", f"BENCH-{i}", 50, 10.0, 20.0) for i in range(1000)]
+        )
+        batch = []
+        for i in range(rows):
+            amount = rng.uniform(100, 5000)
+            ts = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+            batch.append((1, ts.strftime("%Y-%m-%d %H:%M:%S.%f"), amount, amount * 0.3))
+            if len(batch) == 50_000:
+                conn.exec_driver_sql("INSERT INTO sales (owner_id, timestamp, total_amount, total_profit) VALUES (?, ?, ?, ?)", batch)
+                batch = []
+        if batch:
+            conn.exec_driver_sql("INSERT INTO sales (owner_id, timestamp, total_amount, total_profit) VALUES (?, ?, ?, ?)", batch)
+
+def previous_dashboard(db, user, start_date, end_date):
+    sales_query = db.query(models.Sale).filter(models.Sale.timestamp >= start_date, models.Sale.timestamp <= end_date)
+    sales_query = sales_query.filter(models.Sale.owner_id == user.id)
+    total_sales = sales_query.count()
+    total_revenue = sales_query.with_entities(func.sum(models.Sale.total_amount)).scalar() or 0.0
+    total_profit = sales_query.with_entities(func.sum(models.Sale.total_profit)).scalar() or 0.0
+    purchase_query = db.query(models.Purchase).filter(
+        models.Purchase.timestamp >= start_date, models.Purchase.timestamp <= end_date,
+        models.Purchase.is_active == True, models.Purchase.owner_id == user.id)
+    total_expense = purchase_query.with_entities(func.sum(models.Purchase.total_amount)).scalar() or 0.0
+    stock_value = db.query(func.sum(models.Trophy.quantity * models.Trophy.cost_price)).filter(
+        models.Trophy.owner_id == user.id).scalar() or 0.0
+    return {"total_sales_count": total_sales, "total_revenue": total_revenue, "total_profit": total_profit,
+            "total_expense": total_expense, "current_stock_value": stock_value}
+
+def timed(label, fn, repeats, before=None):
+    """Mean ms per fn() call; `before` runs ahead of every call, outside the timing."""
+    if before:
+        before()
+    fn()  # warm-up
+    counter = start_query_count()
+    elapsed = 0.0
+    for _ in range(repeats):
+        if before:
+            before()
+        start = time.perf_counter()
+        result = fn()
+        elapsed += time.perf_counter() - start
+    elapsed_ms = elapsed * 1000 / repeats
+    print(f"{label:>10}: {elapsed_ms:8.3f} ms/call, {counter.count // repeats} queries")
+    return result, elapsed_ms
+
+def run(rows=1_000_000, repeats=10):
+    db_path = os.path.join(tempfile.mkdtemp(), "dashboard.db")
+    engine = create_db_engine(f"sqlite:///{db_path}")
+    print(f"Seeding {rows:,} sales...")
+    seed(engine, rows)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    # seed() bypasses the sales router, so build the daily rollup the dashboard reads
+    rollup_service.rebuild(db)
+    user = db.get(models.User, 1)
+
+    for days in (30, 365):
+        start_date = datetime.utcnow() - timedelta(days=days)
+        end_date = datetime.utcnow()
+        print(f"\nWindow: last {days} days")
+        old, old_ms = timed("previous", lambda: previous_dashboard(db, user, start_date, end_date), repeats)
+        current = lambda: get_dashboard_stats(start_date, end_date, db=db, current_user=user)
+        # Cleared before every call, so this measures the rollup query rather than analytics_cache
+        new, new_ms = timed("current", current, repeats, before=analytics_cache.clear)
+        timed("cache hit", current, repeats)
+        assert old["total_sales_count"] == new["total_sales_count"]
+        assert abs(old["total_revenue"] - new["total_revenue"]) < 1e-3 * max(1.0, old["total_revenue"])
+        print(f"{'speedup':>10}: {old_ms / new_ms:8.2f}x")
+    db.close()
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
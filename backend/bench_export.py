@@ -0,0 +1,81 @@
+"""
+Benchmark: sales export time-to-first-byte, total time and peak memory.
+
+Seeds a throwaway SQLite file with N sales, then runs each mode in a fresh
+subprocess (so peak RSS is per mode):
+
+- materialized-xlsx / materialized-csv: the previous export path (all ORM
+  rows -> list of dicts -> DataFrame -> in-memory file)
+- stream-csv / stream-xlsx: export_service streamers
+
+Usage: python bench_export.py [rows] [mode ...]
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+MODES = ["stream-csv", "stream-xlsx", "materialized-csv", "materialized-xlsx"]
+
+def seed(rows: int):
+    import models
+    from database import engine
+    models.Base.metadata.create_all(bind=engine)
+    start = datetime(2023, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, 50_000):
+            conn.execute(models.Sale.__table__.insert(), [{
+                "owner_id": 1, "timestamp": start + timedelta(minutes=i), "customer_name": f"Customer {i % 900}",
+                "invoice_number": f"INV-{i:08d}", "gstin": "29ABCDE1234F1Z5", "total_amount": 100.0 + i % 50,
+                "tax_amount": 18.0, "total_profit": 20.0, "payment_status": "Paid", "paid_amount": 100.0,
+            } for i in range(offset, min(rows, offset + 50_000))])
+
+def child(mode: str):
+    import io
+    import pandas as pd
+    import models
+    from database import SessionLocal
+    from services import export_service
+
+    start = time.perf_counter()
+    first_byte, size = None, 0
+    if mode.startswith("stream"):
+        for block in export_service.STREAMERS[mode.split("-")[1]]("sales", 1):
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(block)
+    else:
+        db = SessionLocal()
+        data = [{c: getattr(s, c) for c in export_service.columns("sales")}
+                for s in db.query(models.Sale).filter(models.Sale.owner_id == 1).all()]
+        df = pd.DataFrame(data)
+        stream = io.BytesIO()
+        if mode.endswith("xlsx"):
+            with pd.ExcelWriter(stream) as writer:
+                df.to_excel(writer, index=False)
+        else:
+            df.to_csv(stream, index=False)
+        size = stream.tell()
+        first_byte = time.perf_counter() - start
+        db.close()
+    total = time.perf_counter() - start
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:>18} {first_byte:>9.2f} {total:>9.2f} {size / 1e6:>9.1f} {peak_mb:>12.0f}")
+
+def run(rows: int, modes):
+    seed(rows)
+    print(f"{rows} sales rows")
+    print(f"{'mode':>18} {'TTFB s':>9} {'total s':>9} {'MB out':>9} {'peak RSS MB':>12}")
+    for mode in modes:
+        subprocess.run([sys.executable, __file__, "--child", mode], check=True, env=os.environ)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2])
+    else:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'export.db')}"
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000, sys.argv[2:] or MODES)
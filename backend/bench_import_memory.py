@@ -0,0 +1,94 @@
+"""
+Benchmark: peak memory of an inventory or purchase import, buffered vs streaming.
+
+Generates a CSV of the requested size (the import's columns plus a wide
+"notes" column the importer ignores) and imports it into a throwaway SQLite
+file in a fresh subprocess per mode, reporting peak RSS:
+
+- buffered:  the previous path (whole upload in memory, one DataFrame)
+- streaming: import_service.read_chunks + run_import
+
+Purchase files interleave their vendors across the whole file, so streaming
+has to regroup lines that arrive in different chunks.
+
+Usage: python bench_import_memory.py [size_mb] [inventory|purchase]
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+NOTE = "x" * 300
+PURCHASE_VENDORS = 5000
+
+def _inventory_line(i: int) -> str:
+    return f"Trophy {i},MEM-{i:08d},{i % 500},{50 + i % 100}.5,{80 + i % 100}.5,Cups,Brass,{NOTE}\n"
+
+def _purchase_line(i: int) -> str:
+    vendor = (i * 7919) % PURCHASE_VENDORS
+    return f"Vendor {vendor:05d},INV-{vendor},MEM-{i % 50_000:08d},Trophy {i},{1 + i % 9},{10 + i % 50}.5,{NOTE}\n"
+
+HEADERS = {
+    "inventory": ("name,sku,quantity,cost_price,selling_price,category,material,notes\n", _inventory_line),
+    "purchase": ("vendor_name,invoice_number,sku,product_name,quantity,unit_cost,notes\n", _purchase_line),
+}
+
+def generate(path: str, size_mb: int, kind: str = "inventory") -> int:
+    header, line = HEADERS[kind]
+    target = size_mb * 1024 * 1024
+    rows = 0
+    with open(path, "w") as f:
+        f.write(header)
+        while f.tell() < target:
+            f.write("".join(line(i) for i in range(rows, rows + 10_000)))
+            rows += 10_000
+    return rows
+
+def child(mode: str, csv_path: str, kind: str):
+    import io
+    import pandas as pd
+    from sqlalchemy.orm import sessionmaker
+    import models
+    from database import create_db_engine
+    from services import import_service
+
+    engine = create_db_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'mem.db')}")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    start = time.perf_counter()
+    with open(csv_path, "rb") as upload:
+        if mode == "buffered":
+            contents = upload.read()
+            df = pd.read_csv(io.BytesIO(contents))
+            if kind == "inventory":
+                result = import_service.import_inventory(db, df, owner_id=1)
+            else:
+                result = import_service.import_purchases(db, df, owner_id=1)
+        else:
+            chunks = import_service.read_chunks(upload, csv_path)
+            result = import_service.run_import(db, chunks, kind, owner_id=1)
+    db.commit()
+    elapsed = time.perf_counter() - start
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    imported = result["imported"] if kind == "inventory" else result["created"]
+    print(f"{mode:>10} {imported:>10} {elapsed:>9.1f} {peak_mb:>12.0f}")
+
+def run(size_mb=500, kind="inventory"):
+    csv_path = os.path.join(tempfile.mkdtemp(), f"{kind}.csv")
+    rows = generate(csv_path, size_mb, kind)
+    print(f"{size_mb} MB {kind} CSV, {rows} rows")
+    label = "rows" if kind == "inventory" else "purchases"
+    print(f"{'mode':>10} {label:>10} {'seconds':>9} {'peak RSS MB':>12}")
+    for mode in ("streaming", "buffered"):
+        subprocess.run([sys.executable, __file__, "--child", mode, csv_path, kind], check=True)
+    os.remove(csv_path)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], sys.argv[4])
+    else:
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 500, sys.argv[2] if len(sys.argv) > 2 else "inventory")
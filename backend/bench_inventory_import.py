@@ -0,0 +1,78 @@
+"""
+Benchmark: inventory import throughput (rows/sec) on a generated catalogue.
+
+Posts the same generated CSV twice to /import?import_type=inventory against a
+throwaway SQLite file: the first pass inserts every SKU, the second updates them.
+Usage: python bench_inventory_import.py [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import create_db_engine, get_db
+from routers import import_export
+from routers.auth import get_current_user
+
+def generate_csv(rows: int) -> bytes:
+    df = pd.DataFrame({
+        "name": [f"Trophy {i}" for i in range(rows)],
+        "sku": [f"IMP-{i:07d}" for i in range(rows)],
+        "quantity": [i % 500 for i in range(rows)],
+        "cost_price": [50.0 + i % 100 for i in range(rows)],
+        "selling_price": [80.0 + i % 100 for i in range(rows)],
+        "category": ["Cups" if i % 2 else "Medals" for i in range(rows)],
+        "material": ["Brass"] * rows,
+        "min_stock_level": [5] * rows,
+    })
+    return df.to_csv(index=False).encode()
+
+def run(rows=100_000):
+    db_path = os.path.join(tempfile.mkdtemp(), "import_bench.db")
+    engine = create_db_engine(f"sqlite:///{db_path}")
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+    db = Session()
+    user = models.User(username="bench", hashed_password="x", role="user")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+
+    def override_get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(import_export.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    client = TestClient(app)
+
+    payload = generate_csv(rows)
+    print(f"{'pass':>8} {'rows':>8} {'seconds':>9} {'rows/sec':>10}")
+    for label, expected in (("insert", "imported"), ("update", "updated")):
+        start = time.perf_counter()
+        response = client.post("/import", params={"import_type": "inventory"},
+                                files={"file": ("catalogue.csv", payload, "text/csv")})
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200, response.text
+        assert response.json()[expected] == rows, response.json()
+        print(f"{label:>8} {rows:>8} {elapsed:>9.2f} {rows / elapsed:>10.0f}")
+
+    with Session() as check:
+        assert check.query(models.Trophy).count() == rows
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
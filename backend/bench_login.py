@@ -0,0 +1,82 @@
+"""
+Benchmark: login burst throughput and event-loop stalls.
+
+Fires N concurrent logins at the auth router while a probe requests a
+trivial async endpoint every 10 ms, and reports logins/s plus how often the
+probe got through and the longest gap between its responses (how long any
+other request would have waited while logins were in progress):
+
+- event-loop: bcrypt called directly inside `async def login` (previous code)
+- pool: bcrypt on the bounded password-hash pool (PASSWORD_HASH_WORKERS)
+
+Usage: python bench_login.py [logins] [mode ...]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+MODES = ["event-loop", "pool"]
+
+async def burst(app, logins: int):
+    import httpx
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        answered, done = [], asyncio.Event()
+
+        async def probe():
+            while not done.is_set():
+                await client.get("/ping")
+                answered.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        async def login():
+            response = await client.post("/auth/login", data={"username": "bench", "password": "bench123"})
+            assert response.status_code == 200, response.text
+
+        prober = asyncio.create_task(probe())
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+        return elapsed, answered
+
+def run(logins: int, modes):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'login.db')}"
+    from fastapi import FastAPI
+    import models
+    from database import SessionLocal, engine
+    from routers import auth
+    from services.auth_service import PASSWORD_HASH_WORKERS, auth_service, pwd_context
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(models.User(username="bench", hashed_password=auth_service.get_password_hash("bench123"), role="user"))
+    db.commit()
+    db.close()
+
+    app = FastAPI()
+    app.include_router(auth.router)
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    pooled = auth_service.verify_password_async
+
+    async def on_event_loop(plain, hashed):
+        return pwd_context.verify(plain, hashed)
+
+    print(f"{logins} concurrent logins, {os.cpu_count()} CPUs, PASSWORD_HASH_WORKERS={PASSWORD_HASH_WORKERS}")
+    print(f"{'mode':>12} {'logins/s':>9} {'probes/s':>9} {'max gap ms':>11}")
+    for mode in modes:
+        auth_service.verify_password_async = on_event_loop if mode == "event-loop" else pooled
+        elapsed, answered = asyncio.run(burst(app, logins))
+        gaps = [b - a for a, b in zip(answered, answered[1:])]
+        print(f"{mode:>12} {logins / elapsed:>9.2f} {len(answered) / elapsed:>9.1f} {max(gaps) * 1000:>11.1f}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20, sys.argv[2:] or MODES)
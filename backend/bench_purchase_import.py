@@ -0,0 +1,66 @@
+"""
+Benchmark: purchase-order import throughput and SQL statement count.
+
+Imports generated multi-vendor PO files (20 lines per vendor, half of the SKUs
+already in stock) into a throwaway SQLite file and prints rows/sec together
+with the number of statements issued. The statement count must grow with the
+number of 1000-row batches, never with the number of rows or vendors.
+Usage: python bench_purchase_import.py [rows ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import create_db_engine, start_query_count
+from services import import_service
+
+LINES_PER_VENDOR = 20
+
+def generate(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "vendor_name": [f"Vendor {i // LINES_PER_VENDOR:06d}" for i in range(rows)],
+        "vendor_mobile": ["9800000000"] * rows,
+        "invoice_number": [f"INV-{i // LINES_PER_VENDOR}" for i in range(rows)],
+        "sku": [f"PO-{i % (rows // 2 or 1):07d}" for i in range(rows)],
+        "product_name": [f"Trophy {i}" for i in range(rows)],
+        "quantity": [1 + i % 9 for i in range(rows)],
+        "unit_cost": [10.0 + i % 50 for i in range(rows)],
+    })
+
+def run(sizes):
+    print(f"{'rows':>8} {'vendors':>8} {'seconds':>9} {'rows/sec':>10} {'queries':>8}")
+    for rows in sizes:
+        db_path = os.path.join(tempfile.mkdtemp(), "po_bench.db")
+        engine = create_db_engine(f"sqlite:///{db_path}")
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        models.Base.metadata.create_all(bind=engine)
+
+        df = generate(rows)
+        with Session() as db:
+            user = models.User(username="bench", hashed_password="x", role="user")
+            db.add(user)
+            db.flush()
+            stocked = df["sku"].drop_duplicates().iloc[::2]
+            db.execute(models.Trophy.__table__.insert(), [
+                {"owner_id": user.id, "name": sku, "sku": sku, "quantity": 0} for sku in stocked
+            ])
+            db.commit()
+
+            counter = start_query_count()
+            start = time.perf_counter()
+            result = import_service.import_purchases(db, df, user.id)
+            db.commit()
+            elapsed = time.perf_counter() - start
+
+        vendors = rows // LINES_PER_VENDOR
+        assert result["created"] == vendors, result
+        print(f"{rows:>8} {vendors:>8} {elapsed:>9.2f} {rows / elapsed:>10.0f} {counter.count:>8}")
+        engine.dispose()
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000])
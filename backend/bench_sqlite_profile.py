@@ -0,0 +1,110 @@
+"""
+Benchmark: default vs tuned SQLite engine profile under concurrent clients.
+
+Each client thread loops for a fixed duration doing 80% reads (the dashboard
+aggregate over the owner's sales) and 20% writes (a new sale with one item),
+each in its own session. Reports throughput, read/write latency and how many
+operations failed with "database is locked".
+Usage: python bench_sqlite_profile.py [clients] [seconds]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import create_db_engine
+
+def seed(Session):
+    db = Session()
+    user = models.User(username="bench", hashed_password="x", role="user")
+    db.add(user)
+    db.flush()
+    trophy = models.Trophy(owner_id=user.id, name="Item", sku="BENCH-1", quantity=10_000_000,
+                           cost_price=5.0, selling_price=9.0)
+    db.add(trophy)
+    db.flush()
+    now = datetime.utcnow()
+    db.add_all([
+        models.Sale(owner_id=user.id, timestamp=now - timedelta(minutes=i), total_amount=9.0, total_profit=4.0)
+        for i in range(20_000)
+    ])
+    db.commit()
+    ids = (user.id, trophy.id)
+    db.close()
+    return ids
+
+def run_profile(profile, clients, seconds):
+    db_path = os.path.join(tempfile.mkdtemp(), f"{profile}.db")
+    engine = create_db_engine(f"sqlite:///{db_path}", profile=profile)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    owner_id, trophy_id = seed(Session)
+
+    stats = {"reads": [], "writes": [], "locked": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        rng = random.Random()
+        reads, writes, locked = [], [], 0
+        while time.perf_counter() < deadline:
+            db = Session()
+            start = time.perf_counter()
+            try:
+                if rng.random() < 0.8:
+                    db.query(func.count(models.Sale.id), func.sum(models.Sale.total_amount)).filter(
+                        models.Sale.owner_id == owner_id,
+                        models.Sale.timestamp >= datetime.utcnow() - timedelta(days=30)
+                    ).one()
+                    reads.append(time.perf_counter() - start)
+                else:
+                    db.add(models.Sale(owner_id=owner_id, total_amount=9.0, total_profit=4.0, items=[
+                        models.SaleItem(trophy_id=trophy_id, quantity=1, unit_price_at_sale=9.0, unit_cost_at_sale=5.0)
+                    ]))
+                    db.query(models.Trophy).filter(models.Trophy.id == trophy_id).update(
+                        {models.Trophy.quantity: models.Trophy.quantity - 1}, synchronize_session=False)
+                    db.commit()
+                    writes.append(time.perf_counter() - start)
+            except OperationalError as e:
+                db.rollback()
+                if "locked" not in str(e):
+                    raise
+                locked += 1
+            finally:
+                db.close()
+        with lock:
+            stats["reads"] += reads
+            stats["writes"] += writes
+            stats["locked"] += locked
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    def p95(samples):
+        return sorted(samples)[int(len(samples) * 0.95)] * 1000 if samples else 0.0
+
+    ops = len(stats["reads"]) + len(stats["writes"])
+    print(f"{profile:>8} {ops / seconds:>9.0f} {len(stats['reads']):>8} {p95(stats['reads']):>10.2f} "
+          f"{len(stats['writes']):>8} {p95(stats['writes']):>10.2f} {stats['locked']:>7}")
+
+def run(clients=8, seconds=5):
+    print(f"{clients} clients, {seconds}s per profile")
+    print(f"{'profile':>8} {'ops/s':>9} {'reads':>8} {'p95 r ms':>10} {'writes':>8} {'p95 w ms':>10} {'locked':>7}")
+    for profile in ("default", "tuned"):
+        run_profile(profile, clients, seconds)
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from database import SessionLocal, engine
 import models
 from services.auth_service import auth_service
+from services import rollup_service
 import sys
 import logging
 
@@ -178,6 +179,9 @@ def init_users():
                                 purchase.items.append(purchase_item)
                 
                 db.commit()
+                # Count the seeded sales in the daily rollup (an empty one is backfilled right after startup instead)
+                if db.query(models.DailySalesRollup.id).first() is not None:
+                    rollup_service.rebuild(db, guest_user.id)
                 logger.info(f"✓ Guest user seeded with {len(fixture.get('trophies', []))} trophies, {len(fixture.get('sales', []))} sales, {len(fixture.get('purchases', []))} purchases")
             else:
                 logger.warning(f"Fixture file not found at {fixture_path}. Guest user will remain empty.")
@@ -199,6 +203,10 @@ def init_users():
                 logger.info(f"Migrating {len(unowned_items)} items for {model_class.__name__}")
                 for item in unowned_items:
                     item.owner_id = root_user.id
+                # Unowned sales are left out of the daily rollup; they count from now on.
+                # (An empty rollup is backfilled from every sale right after startup instead.)
+                if model_class is models.Sale and db.query(models.DailySalesRollup.id).first() is not None:
+                    rollup_service.apply(db, added=[rollup_service.sale_snapshot(sale) for sale in unowned_items])
             db.commit()
 
         logger.info("Database initialization/verification complete!")
@@ -7,32 +7,46 @@ load_dotenv()
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import models
-from database import engine, SessionLocal
+from database import engine, SessionLocal, query_count_middleware
 from init_db import init_users
 from routers import inventory, import_export, sales, vendors, analytics, purchases, customers, insights, auth
-from backup_service import run_daily_backup
+from migrate_db import migrate
+from services import rollup_service
+from services.import_jobs import job_manager
+from services.auth_service import auth_service
+from services.ai_service import ai_service
+from services.backup_scheduler import BACKUP_SCHEDULER_ENABLED, backup_scheduler
 
 models.Base.metadata.create_all(bind=engine)
+migrate()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Run daily backup
-    print("[Startup] Running daily backup...")
+    # Shared, kept-alive HTTP client for AI provider calls
+    await ai_service.start()
+
+    # Initialize users and seed database
+    print("[Startup] Initializing/Verifying database users...")
+    init_users()
+
+    # Backfill the daily sales rollup on the first start after upgrading
     db = SessionLocal()
     try:
-        result = run_daily_backup(db)
-        print(f"[Startup] Backup result: {result}")
-    except Exception as e:
-        print(f"[Startup] Backup failed: {e}")
+        rollup_service.ensure_backfilled(db)
     finally:
         db.close()
-    
-    # Initialize users and seed database
-    print("[Startup] Initializing/Verifying database users...")
-    init_users()
+
+    # Daily backup runs on a background thread (at once if today's is outstanding)
+    if BACKUP_SCHEDULER_ENABLED:
+        backup_scheduler.start()
     
     yield
-    # Shutdown: Nothing needed
+    backup_scheduler.stop()
+    job_manager.shutdown()
+    auth_service.shutdown()
+    await ai_service.aclose()
+    # Shutdown: close pooled connections so SQLite checkpoints the WAL into inventory.db
+    engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -49,7 +63,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Query-Count"],
 )
+app.middleware("http")(query_count_middleware)
 
 app.include_router(inventory.router)
 app.include_router(sales.router)
@@ -1,33 +1,41 @@
-import sqlite3
-import os
+from sqlalchemy import inspect, text
+from database import engine, Base
+import models
 
-def migrate():
-    db_path = "inventory.db"
-    if not os.path.exists(db_path):
-        print(f"Database {db_path} not found.")
-        return
+# (table, column, column definition) added to databases created before the column existed
+COLUMNS_TO_ADD = [
+    (table, "owner_id", "INTEGER REFERENCES users(id)")
+    for table in ["trophies", "customers", "sales", "vendors", "purchases"]
+] + [
+    ("trophies", "version", "INTEGER NOT NULL DEFAULT 0"),
+    ("sales", "updated_at", "TIMESTAMP"),
+]
 
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+def migrate():
+    inspector = inspect(engine)
 
-    tables_to_migrate = ["trophies", "customers", "sales", "vendors", "purchases"]
-    
-    for table in tables_to_migrate:
+    for table, column, definition in COLUMNS_TO_ADD:
+        if not inspector.has_table(table):
+            continue
         try:
-            # Check if owner_id column exists
-            cursor.execute(f"PRAGMA table_info({table})")
-            columns = [info[1] for info in cursor.fetchall()]
-            
-            if "owner_id" not in columns:
-                print(f"Adding owner_id to {table}...")
-                cursor.execute(f"ALTER TABLE {table} ADD COLUMN owner_id INTEGER REFERENCES users(id)")
-                conn.commit()
-            else:
-                print(f"owner_id already exists in {table}.")
+            columns = [info["name"] for info in inspector.get_columns(table)]
+            if column not in columns:
+                print(f"Adding {column} to {table}...")
+                with engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
         except Exception as e:
             print(f"Error migrating {table}: {e}")
 
-    conn.close()
+    # Indexes declared on the models but missing from an older database
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                print(f"Creating index {index.name}...")
+                index.create(bind=engine)
+
     print("Migration complete!")
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from database import Base
 import datetime
@@ -25,9 +25,15 @@ class Trophy(Base):
     selling_price = Column(Float, default=0.0)
     sku = Column(String, unique=True, index=True)
     min_stock_level = Column(Integer, default=5)
+    version = Column(Integer, nullable=False, default=0, server_default=text("0")) # Optimistic concurrency for stock
 
     owner = relationship("User")
 
+    __table_args__ = (
+        Index("ix_trophies_owner_sku", "owner_id", "sku"),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
 class Customer(Base):
     __tablename__ = "customers"
 
@@ -46,8 +52,8 @@ class Sale(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     owner_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=True) # Data Isolation
-    timestamp = Column(DateTime, default=datetime.datetime.utcnow)
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=True)
+    timestamp = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    customer_id = Column(Integer, ForeignKey("customers.id"), index=True, nullable=True)
     customer_name = Column(String, nullable=True)
     total_amount = Column(Float, default=0.0)
     total_profit = Column(Float, default=0.0)
@@ -56,17 +62,25 @@ class Sale(Base):
     tax_amount = Column(Float, default=0.0)
     payment_status = Column(String, default="Paid")
     paid_amount = Column(Float, default=0.0)
+    # Incremental backups pick up sales created or changed since the last run
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, index=True)
 
     owner = relationship("User")
     customer = relationship("Customer")
     items = relationship("SaleItem", back_populates="sale", cascade="all, delete-orphan")
 
+    # Every hot query filters by owner and then a date range or invoice
+    __table_args__ = (
+        Index("ix_sales_owner_timestamp", "owner_id", "timestamp"),
+        Index("ix_sales_owner_invoice", "owner_id", "invoice_number"),
+    )
+
 class SaleItem(Base):
     __tablename__ = "sale_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey("sales.id"))
-    trophy_id = Column(Integer, ForeignKey("trophies.id"))
+    sale_id = Column(Integer, ForeignKey("sales.id"), index=True)
+    trophy_id = Column(Integer, ForeignKey("trophies.id"), index=True)
     quantity = Column(Integer)
     unit_price_at_sale = Column(Float)
     unit_cost_at_sale = Column(Float)
@@ -78,6 +92,33 @@ class SaleItem(Base):
     def trophy_name(self):
         return self.trophy.name if self.trophy else "Unknown Item"
 
+class SaleDeletion(Base):
+    """Tombstone of a deleted sale, so incremental backups can replay the deletion."""
+    __tablename__ = "sale_deletions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sale_id = Column(Integer, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    deleted_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class DailySalesRollup(Base):
+    """Per-owner, per-day sales totals maintained alongside every sale write."""
+    __tablename__ = "daily_sales_rollup"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    revenue = Column(Float, default=0.0)
+    profit = Column(Float, default=0.0)
+    count = Column(Integer, default=0)
+    items_sold = Column(Integer, default=0)
+    paid_amount = Column(Float, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("owner_id", "day", name="uq_daily_sales_rollup_owner_day"),
+        Index("ix_daily_sales_rollup_day", "day"),
+    )
+
 class Vendor(Base):
     __tablename__ = "vendors"
 
@@ -91,13 +132,17 @@ class Vendor(Base):
 
     owner = relationship("User")
 
+    __table_args__ = (
+        Index("ix_vendors_owner_name", "owner_id", "name"),
+    )
+
 class Purchase(Base):
     __tablename__ = "purchases"
 
     id = Column(Integer, primary_key=True, index=True)
     owner_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=True) # Data Isolation
-    timestamp = Column(DateTime, default=datetime.datetime.utcnow)
-    vendor_id = Column(Integer, ForeignKey("vendors.id"))
+    timestamp = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    vendor_id = Column(Integer, ForeignKey("vendors.id"), index=True)
     total_amount = Column(Float, default=0.0)
     is_active = Column(Boolean, default=True)
     content_hash = Column(String, index=True, nullable=True)
@@ -110,12 +155,18 @@ class Purchase(Base):
     vendor = relationship("Vendor")
     items = relationship("PurchaseItem", back_populates="purchase", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_purchases_owner_timestamp", "owner_id", "timestamp"),
+        Index("ix_purchases_owner_content_hash", "owner_id", "content_hash"),
+        Index("ix_purchases_owner_invoice", "owner_id", "invoice_number"),
+    )
+
 class PurchaseItem(Base):
     __tablename__ = "purchase_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    purchase_id = Column(Integer, ForeignKey("purchases.id"))
-    trophy_id = Column(Integer, ForeignKey("trophies.id"))
+    purchase_id = Column(Integer, ForeignKey("purchases.id"), index=True)
+    trophy_id = Column(Integer, ForeignKey("trophies.id"), index=True)
     quantity = Column(Integer)
     unit_cost = Column(Float)
 
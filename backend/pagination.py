@@ -0,0 +1,72 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+# Keyset (cursor) pagination.
+# Pages are addressed by the sort key of the last row served instead of an
+# OFFSET, so the database seeks straight to the next page through the index
+# and page 5,000 costs the same as page 1. Cursors are opaque to clients.
+
+def encode_cursor(position: dict) -> str:
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    """{"id": int, "ts": datetime or None}; any malformed cursor is a 400, never a 500."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        ts = position.get("ts")
+        return {
+            "id": int(position["id"]),
+            "ts": datetime.fromisoformat(ts) if ts is not None else None,
+        }
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def paginate_by_id(query, id_col, cursor: Optional[str], limit: int):
+    """Oldest first by primary key. Returns (rows, next_cursor)."""
+    if cursor:
+        query = query.filter(id_col > decode_cursor(cursor)["id"])
+    rows = query.order_by(id_col).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({"id": getattr(rows[-1], id_col.key)})
+    return rows, next_cursor
+
+def paginate_newest_first(query, ts_col, id_col, cursor: Optional[str], limit: int):
+    """
+    Newest first by (timestamp, id). Returns (rows, next_cursor).
+    Rows without a timestamp are served after all dated rows.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    rows = []
+
+    if position is None or position["ts"] is not None:
+        dated = query.filter(ts_col.isnot(None))
+        if position:
+            after = (position["ts"], position["id"])
+            dated = dated.filter(tuple_(ts_col, id_col) < after)
+        rows = dated.order_by(ts_col.desc(), id_col.desc()).limit(limit + 1).all()
+
+    if len(rows) <= limit:
+        undated = query.filter(ts_col.is_(None))
+        if position and position["ts"] is None:
+            undated = undated.filter(id_col < position["id"])
+        rows += undated.order_by(id_col.desc()).limit(limit + 1 - len(rows)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        last_ts = getattr(last, ts_col.key)
+        next_cursor = encode_cursor({
+            "ts": last_ts.isoformat() if last_ts is not None else None,
+            "id": getattr(last, id_col.key)
+        })
+    return rows, next_cursor
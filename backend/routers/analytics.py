@@ -4,6 +4,8 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 import models, database
+from services import rollup_service
+from services.cache_service import analytics_cache, cache_key
 from .auth import get_current_user
 
 router = APIRouter(
@@ -18,39 +20,42 @@ def get_dashboard_stats(
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(get_current_user)
 ):
+    key = cache_key(current_user, "dashboard",
+                    start=start_date.isoformat() if start_date else None,
+                    end=end_date.isoformat() if end_date else None)
+    cached = analytics_cache.get(key)
+    if cached is not None:
+        return cached
+    cache_version = analytics_cache.version
+
     if not start_date:
         start_date = datetime.utcnow() - timedelta(days=30)
     if not end_date:
         end_date = datetime.utcnow()
 
-    # Sales Analytics
-    sales_query = db.query(models.Sale).filter(models.Sale.timestamp >= start_date, models.Sale.timestamp <= end_date)
-    if current_user.role != "root":
-        sales_query = sales_query.filter(models.Sale.owner_id == current_user.id)
-    
-    total_sales = sales_query.count()
-    total_revenue = sales_query.with_entities(func.sum(models.Sale.total_amount)).scalar() or 0.0
-    total_profit = sales_query.with_entities(func.sum(models.Sale.total_profit)).scalar() or 0.0
+    owner_id = None if current_user.role == "root" else current_user.id
+
+    # Sales Analytics: whole days from the daily rollup, partial edge days from raw sales
+    total_sales, total_revenue, total_profit = rollup_service.sales_totals(db, owner_id, start_date, end_date)
 
-    # Purchase Analytics (Expenses)
-    purchase_query = db.query(models.Purchase).filter(
+    # Purchase Analytics (Expenses) and Stock Value in one round trip
+    purchase_query = db.query(func.sum(models.Purchase.total_amount)).filter(
         models.Purchase.timestamp >= start_date, 
         models.Purchase.timestamp <= end_date,
         models.Purchase.is_active == True
     )
-    if current_user.role != "root":
-        purchase_query = purchase_query.filter(models.Purchase.owner_id == current_user.id)
-    
-    total_expense = purchase_query.with_entities(func.sum(models.Purchase.total_amount)).scalar() or 0.0
-
-    # Stock Value
     stock_query = db.query(func.sum(models.Trophy.quantity * models.Trophy.cost_price))
-    if current_user.role != "root":
-        stock_query = stock_query.filter(models.Trophy.owner_id == current_user.id)
-    
-    stock_value = stock_query.scalar() or 0.0
+    if owner_id is not None:
+        purchase_query = purchase_query.filter(models.Purchase.owner_id == owner_id)
+        stock_query = stock_query.filter(models.Trophy.owner_id == owner_id)
 
-    return {
+    total_expense, stock_value = db.query(
+        purchase_query.scalar_subquery(), stock_query.scalar_subquery()
+    ).one()
+    total_expense = total_expense or 0.0
+    stock_value = stock_value or 0.0
+
+    stats = {
         "period": {"start": start_date, "end": end_date},
         "total_sales_count": total_sales,
         "total_revenue": total_revenue,
@@ -58,6 +63,8 @@ def get_dashboard_stats(
         "total_expense": total_expense,
         "current_stock_value": stock_value
     }
+    analytics_cache.set(key, stats, version=cache_version)
+    return stats
 
 @router.get("/sales_trend")
 def get_sales_trend(
@@ -67,22 +74,27 @@ def get_sales_trend(
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(get_current_user)
 ):
+    if not start_date or not end_date:
+        key = cache_key(current_user, "sales_trend", days=days)
+    else:
+        key = cache_key(current_user, "sales_trend", start=start_date.isoformat(), end=end_date.isoformat())
+    cached = analytics_cache.get(key)
+    if cached is not None:
+        return cached
+    cache_version = analytics_cache.version
+
     if not start_date or not end_date:
         start_date = datetime.utcnow() - timedelta(days=days)
         end_date = datetime.utcnow()
     
-    query = db.query(
-        func.date(models.Sale.timestamp).label('date'),
-        func.sum(models.Sale.total_amount).label('amount'),
-        func.sum(models.Sale.total_profit).label('profit')
-    ).filter(
-        models.Sale.timestamp >= start_date,
-        models.Sale.timestamp <= end_date
-    )
-    
-    if current_user.role != "root":
-        query = query.filter(models.Sale.owner_id == current_user.id)
-        
-    sales = query.group_by(func.date(models.Sale.timestamp)).order_by(func.date(models.Sale.timestamp)).all()
+    owner_id = None if current_user.role == "root" else current_user.id
+    sales = rollup_service.daily_totals(db, owner_id, start_date, end_date)
+
+    trend = [{"date": day, "amount": amount, "profit": profit} for day, amount, profit in sales]
+    analytics_cache.set(key, trend, version=cache_version)
+    return trend
 
-    return [{"date": s.date, "amount": s.amount, "profit": s.profit} for s in sales]
+@router.get("/cache-stats")
+def get_cache_stats(current_user: models.User = Depends(get_current_user)):
+    """Hit/miss counters of the analytics cache."""
+    return analytics_cache.stats()
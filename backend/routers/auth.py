@@ -1,43 +1,63 @@
+import time
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from starlette.concurrency import run_in_threadpool
+from database import get_db
 import models
-from services.auth_service import auth_service
+from services.auth_service import Principal, auth_service
+from services.cache_service import principal_cache
 from typing import Optional
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _load_principal(db: Session, username: str):
+    return db.query(
+        models.User.id, models.User.username, models.User.role, models.User.is_active
+    ).filter(models.User.username == username).first()
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _find_user(db: Session, username: str):
+    return db.query(models.User).filter(models.User.username == username).first()
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """
+    The request's user, from the principal cache when the token was seen
+    recently. Shares the request's session (database.get_db) for the lookup.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    payload = auth_service.decode_token(token)
-    if payload is None:
-        raise credentials_exception
-    username: str = payload.get("sub")
-    if username is None:
+    cached = principal_cache.get(token)
+    if cached is None:
+        payload = auth_service.decode_token(token)
+        if payload is None:
+            raise credentials_exception
+        username: str = payload.get("sub")
+        if username is None:
+            raise credentials_exception
+
+        cache_version = principal_cache.version
+        row = await run_in_threadpool(_load_principal, db, username)
+        if row is None:
+            raise credentials_exception
+        cached = (Principal(*row), payload.get("exp"))
+        principal_cache.set(token, cached, version=cache_version)
+
+    principal, expires = cached
+    # A cached entry must not outlive its token
+    if expires is not None and expires < time.time():
         raise credentials_exception
-    
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if user is None:
+    if principal.is_active is False:
         raise credentials_exception
-    return user
+    return principal
 
 @router.post("/login")
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     print(f"[Login Attempt] Username: {form_data.username}")
-    user = db.query(models.User).filter(models.User.username == form_data.username).first()
+    user = await run_in_threadpool(_find_user, db, form_data.username)
     
     if not user:
         print(f"[Login Failed] User '{form_data.username}' not found in database.")
@@ -47,7 +67,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not auth_service.verify_password(form_data.password, user.hashed_password):
+    if not await auth_service.verify_password_async(form_data.password, user.hashed_password):
         print(f"[Login Failed] Password mismatch for user '{form_data.username}'.")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,10 @@
+from fastapi import Depends
+from sqlalchemy.orm import Session
+import models
+from database import get_db
+from services import cache_service
+from .auth import get_current_user
+
+def invalidate_cache_on_commit(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """Router dependency: when the request's session commits, drop the analytics it made stale."""
+    cache_service.track_writes(db, current_user)
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Union
 import models, schemas
 from database import get_db
+from pagination import paginate_by_id
 
 from .auth import get_current_user
 
@@ -19,8 +20,8 @@ def create_customer(customer: schemas.CustomerCreate, db: Session = Depends(get_
     db.refresh(db_customer)
     return db_customer
 
-@router.get("/", response_model=List[schemas.Customer])
-def read_customers(skip: int = 0, limit: int = 100, search: str = None, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+@router.get("/", response_model=Union[List[schemas.Customer], schemas.CustomerPage])
+def read_customers(skip: int = 0, limit: int = 100, search: str = None, cursor: str = None, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
     query = db.query(models.Customer)
     if current_user.role != "root":
         query = query.filter(models.Customer.owner_id == current_user.id)
@@ -28,6 +29,11 @@ def read_customers(skip: int = 0, limit: int = 100, search: str = None, db: Sess
     if search:
         query = query.filter(models.Customer.name.ilike(f"%{search}%"))
     
+    # Keyset mode: pass cursor (empty for the first page) to get {items, next_cursor}
+    if cursor is not None:
+        customers, next_cursor = paginate_by_id(query, models.Customer.id, cursor, limit)
+        return {"items": customers, "next_cursor": next_cursor}
+
     customers = query.offset(skip).limit(limit).all()
     return customers
 
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from starlette.concurrency import run_in_threadpool
+from services import rollup_service
 from services.ai_service import ai_service
+from services.ai_cache import completion_cache
 import models
 from datetime import datetime, timedelta
 
@@ -17,17 +23,12 @@ async def get_business_summary(db: Session = Depends(get_db), current_user: mode
     """
     Get AI-generated insights about the business performance for the current user.
     """
-    # 1. Gather recent data for context
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    query = db.query(models.Sale).filter(models.Sale.timestamp >= thirty_days_ago)
-    
-    if current_user.role != "root":
-        query = query.filter(models.Sale.owner_id == current_user.id)
-    
-    recent_sales = query.all()
-    
-    total_revenue = sum(sale.total_amount for sale in recent_sales)
-    total_sales_count = len(recent_sales)
+    # 1. Gather recent data for context (off the event loop: the query blocks)
+    now = datetime.utcnow()
+    owner_id = None if current_user.role == "root" else current_user.id
+    total_sales_count, total_revenue, _ = await run_in_threadpool(
+        rollup_service.sales_totals, db, owner_id, now - timedelta(days=30), now
+    )
     
     # 2. Prepare prompt for AI
     business_name = current_user.username if current_user.username != "root" else "Retail Business"
@@ -46,26 +47,100 @@ async def get_business_summary(db: Session = Depends(get_db), current_user: mode
         {"role": "user", "content": prompt}
     ]
     
-    # 3. Get AI response
+    # 3. Get AI response (cached: every dashboard load sends this same prompt until the figures change)
     try:
         insight = await ai_service.get_chat_completion(messages)
         return {"insight": insight}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _chat_messages(query: str, current_user) -> list:
+    business_name = current_user.username if current_user.username != "root" else "Retail Business"
+    return [
+        {"role": "system", "content": f"You are a helpful assistant for {business_name}. Answer business queries clearly."},
+        {"role": "user", "content": query}
+    ]
+
 @router.post("/chat")
 async def chat_with_assistant(query: str, current_user: models.User = Depends(get_current_user)):
     """
     Generic chat endpoint for business queries.
     """
-    business_name = current_user.username if current_user.username != "root" else "Retail Business"
-    messages = [
-        {"role": "system", "content": f"You are a helpful assistant for {business_name}. Answer business queries clearly."},
-        {"role": "user", "content": query}
-    ]
+    messages = _chat_messages(query, current_user)
     
     try:
-        response = await ai_service.get_chat_completion(messages)
+        # Asking again should get a fresh answer
+        response = await ai_service.get_chat_completion(messages, cache=False)
         return {"response": response}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+async def _disconnected(request: Request):
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+# Provider streams still being closed after their client left
+_closing = set()
+
+async def _until_disconnected(request: Request, tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Pass `tokens` through until the client disconnects. On ASGI 2.4 servers the
+    response only notices a closed connection on its next write; watching for
+    http.disconnect also stops a provider that has not sent anything yet.
+    """
+    gone = asyncio.ensure_future(_disconnected(request))
+    step = None
+    try:
+        while True:
+            step = asyncio.ensure_future(tokens.__anext__())
+            await asyncio.wait({step, gone}, return_when=asyncio.FIRST_COMPLETED)
+            if not step.done():
+                return
+            try:
+                token = step.result()
+            except StopAsyncIteration:
+                return
+            yield token
+    finally:
+        gone.cancel()
+        # The response itself is usually being cancelled too; shielded, the provider stream still gets closed
+        closing = asyncio.ensure_future(_close_stream(step, tokens))
+        _closing.add(closing)
+        closing.add_done_callback(_closing.discard)
+        await asyncio.shield(closing)
+
+async def _close_stream(step: Optional[asyncio.Future], tokens: AsyncIterator[str]):
+    if step is not None and not step.done():
+        step.cancel()
+        await asyncio.gather(step, return_exceptions=True)
+    await tokens.aclose()
+
+@router.post("/chat/stream")
+async def stream_chat_with_assistant(query: str, request: Request, current_user: models.User = Depends(get_current_user)):
+    """
+    /chat as Server-Sent Events: `data: {"token": ...}` for each piece of the
+    answer as the provider generates it, then `event: done` (or `event: error`).
+    """
+    messages = _chat_messages(query, current_user)
+
+    async def events():
+        try:
+            async for token in _until_disconnected(request, ai_service.stream_chat_completion(messages)):
+                yield _sse({"token": token})
+        except Exception as e:
+            # Headers are already sent: report the failure in-band
+            yield _sse({"detail": str(e)}, event="error")
+            return
+        yield _sse({}, event="done")
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/cache-stats")
+def get_cache_stats(current_user: models.User = Depends(get_current_user)):
+    """Hit/miss and coalescing counters of the AI completion cache."""
+    return completion_cache.stats()
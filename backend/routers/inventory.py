@@ -1,14 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.orm.exc import StaleDataError
+from typing import List, Union
 import models, schemas
 from database import get_db
+from pagination import paginate_by_id
 
 from .auth import get_current_user
+from .cache_hooks import invalidate_cache_on_commit
+from services.cache_service import analytics_cache, cache_key
 
 router = APIRouter(
     prefix="/inventory",
     tags=["inventory"],
+    dependencies=[Depends(invalidate_cache_on_commit)],
 )
 
 @router.post("/", response_model=schemas.Trophy)
@@ -19,8 +24,8 @@ def create_item(item: schemas.TrophyCreate, db: Session = Depends(get_db), curre
     db.refresh(db_item)
     return db_item
 
-@router.get("/", response_model=List[schemas.Trophy])
-def read_items(skip: int = 0, limit: int = 100, search: str = None, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+@router.get("/", response_model=Union[List[schemas.Trophy], schemas.TrophyPage])
+def read_items(skip: int = 0, limit: int = 100, search: str = None, cursor: str = None, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
     query = db.query(models.Trophy)
     # Isolation: Root sees all, others see only theirs
     if current_user.role != "root":
@@ -32,6 +37,11 @@ def read_items(skip: int = 0, limit: int = 100, search: str = None, db: Session
             (models.Trophy.name.ilike(f"%{search}%")) | 
             (models.Trophy.sku.ilike(f"%{search}%"))
         )
+    # Keyset mode: pass cursor (empty for the first page) to get {items, next_cursor}
+    if cursor is not None:
+        items, next_cursor = paginate_by_id(query, models.Trophy.id, cursor, limit)
+        return {"items": items, "next_cursor": next_cursor}
+
     items = query.offset(skip).limit(limit).all()
     return items
 
@@ -44,6 +54,12 @@ def get_top_sellers(limit: int = 5, db: Session = Depends(get_db), current_user:
     from sqlalchemy import func
     import datetime
     
+    key = cache_key(current_user, "top_sellers", limit=limit)
+    cached = analytics_cache.get(key)
+    if cached is not None:
+        return cached
+    cache_version = analytics_cache.version
+
     thirty_days_ago = datetime.datetime.utcnow() - datetime.timedelta(days=30)
     
     # Get products ordered by total quantity sold in last 30 days
@@ -100,6 +116,7 @@ def get_top_sellers(limit: int = 5, db: Session = Depends(get_db), current_user:
                 "total_sold": 0
             })
     
+    analytics_cache.set(key, top_sellers, version=cache_version)
     return top_sellers
 
 @router.get("/{item_id}", response_model=schemas.Trophy)
@@ -126,7 +143,12 @@ def update_item(item_id: int, item: schemas.TrophyUpdate, db: Session = Depends(
     for key, value in item.dict().items():
         setattr(db_item, key, value)
     
-    db.commit()
+    try:
+        db.commit()
+    except StaleDataError:
+        # Stock moved (e.g. a sale went through) since this item was read
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Item was modified by another request, please reload and retry")
     db.refresh(db_item)
     return db_item
 
@@ -141,5 +163,10 @@ def delete_item(item_id: int, db: Session = Depends(get_db), current_user: model
         raise HTTPException(status_code=404, detail="Item not found")
     
     db.delete(db_item)
-    db.commit()
+    try:
+        db.commit()
+    except StaleDataError:
+        # Stock moved (e.g. a sale went through) since this item was read
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Item was modified by another request, please reload and retry")
     return {"ok": True}
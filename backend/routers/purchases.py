@@ -1,17 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 import database
 import models
 import schemas # We might need to add Purchase schemas here if not present
 from pydantic import BaseModel
 from datetime import datetime
+from pagination import paginate_newest_first
 
 from .auth import get_current_user
+from .sales import _with_stock_retries
+from .cache_hooks import invalidate_cache_on_commit
 
 router = APIRouter(
     prefix="/purchases",
     tags=["purchases"],
+    dependencies=[Depends(invalidate_cache_on_commit)],
 )
 
 # Response Schemas (Simple version for listing)
@@ -39,10 +43,15 @@ class PurchaseSchema(BaseModel):
     class Config:
         orm_mode = True
 
-@router.get("/", response_model=List[PurchaseSchema])
+class PurchasePage(BaseModel):
+    items: List[PurchaseSchema]
+    next_cursor: Optional[str] = None
+
+@router.get("/", response_model=Union[List[PurchaseSchema], PurchasePage])
 def read_purchases(
     skip: int = 0, 
     limit: int = 100, 
+    cursor: str = None,
     vendor_id: int = None, 
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(get_current_user)
@@ -54,7 +63,12 @@ def read_purchases(
     if vendor_id:
         query = query.filter(models.Purchase.vendor_id == vendor_id)
 
-    purchases = query.order_by(models.Purchase.timestamp.desc()).offset(skip).limit(limit).all()
+    # Keyset mode: pass cursor (empty for the first page) to get {items, next_cursor}
+    next_cursor = None
+    if cursor is not None:
+        purchases, next_cursor = paginate_newest_first(query, models.Purchase.timestamp, models.Purchase.id, cursor, limit)
+    else:
+        purchases = query.order_by(models.Purchase.timestamp.desc()).offset(skip).limit(limit).all()
     
     result = []
     for p in purchases:
@@ -79,10 +93,16 @@ def read_purchases(
             "paid_amount": p.paid_amount or 0.0,
             "items": items_data
         })
+
+    if cursor is not None:
+        return {"items": result, "next_cursor": next_cursor}
     return result
 
 @router.delete("/{purchase_id}")
 def delete_purchase(purchase_id: int, revert_stock: bool = False, db: Session = Depends(database.get_db), current_user: models.User = Depends(get_current_user)):
+    return _with_stock_retries(db, lambda: _delete_purchase(purchase_id, revert_stock, db, current_user))
+
+def _delete_purchase(purchase_id: int, revert_stock: bool, db: Session, current_user: models.User):
     query = db.query(models.Purchase).filter(models.Purchase.id == purchase_id)
     if current_user.role != "root":
         query = query.filter(models.Purchase.owner_id == current_user.id)
@@ -92,13 +112,15 @@ def delete_purchase(purchase_id: int, revert_stock: bool = False, db: Session =
         raise HTTPException(status_code=404, detail="Purchase not found")
 
     if revert_stock:
+        # Same atomic update as sales._release_stock, so a sale of the same trophy cannot make it stale
         for item in purchase.items:
             t_query = db.query(models.Trophy).filter(models.Trophy.id == item.trophy_id)
             if current_user.role != "root":
                 t_query = t_query.filter(models.Trophy.owner_id == current_user.id)
-            trophy = t_query.first()
-            if trophy:
-                trophy.quantity -= item.quantity 
+            t_query.update({
+                models.Trophy.quantity: models.Trophy.quantity - item.quantity,
+                models.Trophy.version: models.Trophy.version + 1
+            }, synchronize_session=False)
         purchase.stock_reverted = True
     else:
         purchase.stock_reverted = False
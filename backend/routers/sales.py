@@ -1,55 +1,122 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from typing import List, Optional, Union
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.exc import StaleDataError
 import models, schemas
 from database import get_db
+from services import rollup_service
+from pagination import paginate_newest_first
 from .auth import get_current_user
+from .cache_hooks import invalidate_cache_on_commit
 
 router = APIRouter(
     prefix="/sales",
     tags=["sales"],
+    dependencies=[Depends(invalidate_cache_on_commit)],
 )
 
+# Checkout attempts before a contended sale gives up with 409
+MAX_STOCK_RETRIES = 5
+
+class StockConflict(Exception):
+    """A trophy's stock moved between reading it and reserving it."""
+
+def _with_stock_retries(db: Session, operation):
+    """
+    Run a stock-changing operation, retrying from a fresh read when another
+    till won the race for the same trophies. Nothing is locked globally:
+    each attempt only fails if its own conditional updates matched no row.
+    """
+    for attempt in range(MAX_STOCK_RETRIES):
+        try:
+            return operation()
+        except (StockConflict, StaleDataError):
+            db.rollback()
+        except OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            db.rollback()
+    raise HTTPException(status_code=409, detail="Stock is being updated by another sale, please retry")
+
+def _requested_quantities(items):
+    requested = {}
+    for item in items:
+        requested[item.trophy_id] = requested.get(item.trophy_id, 0) + item.quantity
+    return requested
+
+def _load_trophies(db: Session, trophy_ids, current_user: models.User):
+    query = db.query(models.Trophy).filter(models.Trophy.id.in_(trophy_ids)).populate_existing()
+    # Isolation: Check if trophies belong to current user
+    if current_user.role != "root":
+        query = query.filter(models.Trophy.owner_id == current_user.id)
+    return {t.id: t for t in query.all()}
+
+def _check_stock(trophies, requested):
+    for trophy_id, quantity in requested.items():
+        trophy = trophies.get(trophy_id)
+        if not trophy:
+            raise HTTPException(status_code=404, detail=f"Trophy with ID {trophy_id} not found or access denied")
+        if trophy.quantity < quantity:
+            raise HTTPException(status_code=400, detail=f"Not enough stock for {trophy.name}. Available: {trophy.quantity}")
+
+def _reserve_stock(db: Session, trophies, requested):
+    # Compare-and-swap: only decrement while enough stock is still there
+    for trophy_id, quantity in requested.items():
+        updated = db.query(models.Trophy).filter(
+            models.Trophy.id == trophy_id,
+            models.Trophy.quantity >= quantity
+        ).update({
+            models.Trophy.quantity: models.Trophy.quantity - quantity,
+            models.Trophy.version: models.Trophy.version + 1
+        }, synchronize_session=False)
+        if not updated:
+            raise StockConflict(trophies[trophy_id].name)
+
+def _release_stock(db: Session, requested, current_user: models.User):
+    for trophy_id, quantity in requested.items():
+        t_query = db.query(models.Trophy).filter(models.Trophy.id == trophy_id)
+        if current_user.role != "root":
+            t_query = t_query.filter(models.Trophy.owner_id == current_user.id)
+        t_query.update({
+            models.Trophy.quantity: models.Trophy.quantity + quantity,
+            models.Trophy.version: models.Trophy.version + 1
+        }, synchronize_session=False)
+
 @router.post("/", response_model=schemas.Sale)
 def create_sale(sale_data: schemas.SaleCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    # 1. Calculate totals and check stock
+    return _with_stock_retries(db, lambda: _create_sale(sale_data, db, current_user))
+
+def _create_sale(sale_data: schemas.SaleCreate, db: Session, current_user: models.User):
+    # 1. Fetch every referenced trophy in one round trip
+    requested = _requested_quantities(sale_data.items)
+    trophies = _load_trophies(db, requested.keys(), current_user)
+
+    # 2. Validate stock in memory before touching anything
+    _check_stock(trophies, requested)
+
+    # 3. Calculate totals and build Sale Item Records
     total_amount = 0.0
     total_cost = 0.0
     sale_items_db = []
 
     for item in sale_data.items:
-        # Isolation: Check if trophy belongs to current user
-        query = db.query(models.Trophy).filter(models.Trophy.id == item.trophy_id)
-        if current_user.role != "root":
-            query = query.filter(models.Trophy.owner_id == current_user.id)
-        
-        trophy = query.first()
-        if not trophy:
-            raise HTTPException(status_code=404, detail=f"Trophy with ID {item.trophy_id} not found or access denied")
-        
-        if trophy.quantity < item.quantity:
-             raise HTTPException(status_code=400, detail=f"Not enough stock for {trophy.name}. Available: {trophy.quantity}")
+        trophy = trophies[item.trophy_id]
+        total_amount += trophy.selling_price * item.quantity
+        total_cost += trophy.cost_price * item.quantity
 
-        # Update Stock
-        trophy.quantity -= item.quantity
-        
-        # Calculate financials
-        line_total = trophy.selling_price * item.quantity
-        line_cost = trophy.cost_price * item.quantity
-        
-        total_amount += line_total
-        total_cost += line_cost
-
-        # Create Sale Item Record
-        sale_item_db = models.SaleItem(
+        sale_items_db.append(models.SaleItem(
             trophy_id=trophy.id,
             quantity=item.quantity,
             unit_price_at_sale=trophy.selling_price,
             unit_cost_at_sale=trophy.cost_price
-        )
-        sale_items_db.append(sale_item_db)
+        ))
+
+    # 4. Decrement stock with conditional updates so a concurrent sale can't drive it negative
+    _reserve_stock(db, trophies, requested)
 
-    # 2. Create Sale Record
+    # 5. Create Sale Record
     total_profit = total_amount - total_cost
     
     # Handle paid amount based on status if not explicitly provided
@@ -61,24 +128,19 @@ def create_sale(sale_data: schemas.SaleCreate, db: Session = Depends(get_db), cu
 
     new_sale = models.Sale(
         owner_id=current_user.id,
+        timestamp=datetime.utcnow(),
         customer_name=sale_data.customer_name,
         customer_id=sale_data.customer_id,
         payment_status=sale_data.payment_status or "Paid",
         paid_amount=initial_paid,
         total_amount=total_amount,
-        total_profit=total_profit
+        total_profit=total_profit,
+        items=sale_items_db
     )
-    
     db.add(new_sale)
-    db.commit()
-    db.refresh(new_sale)
-
-    # 3. Associate Items with Sale
-    for si in sale_items_db:
-        si.sale_id = new_sale.id
-        db.add(si)
+    rollup_service.apply(db, added=[rollup_service.sale_snapshot(new_sale)])
     
-    # 4. Update Customer Ledger if linked
+    # 6. Update Customer Ledger if linked
     if sale_data.customer_id:
         c_query = db.query(models.Customer).filter(models.Customer.id == sale_data.customer_id)
         if current_user.role != "root":
@@ -93,6 +155,7 @@ def create_sale(sale_data: schemas.SaleCreate, db: Session = Depends(get_db), cu
                 customer.current_balance += abs(unpaid_amount)
             db.add(customer)
 
+    # Sale, items, stock and ledger land in a single transaction
     db.commit()
     db.refresh(new_sale)
     return new_sale
@@ -106,6 +169,7 @@ def pay_sale(sale_id: int, amount: Optional[float] = None, db: Session = Depends
     sale = s_query.first()
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
+    before = rollup_service.sale_snapshot(sale)
     
     remaining = sale.total_amount - sale.paid_amount
     payment_made = amount if amount is not None else remaining
@@ -131,6 +195,7 @@ def pay_sale(sale_id: int, amount: Optional[float] = None, db: Session = Depends
             customer.current_balance += payment_made
             db.add(customer)
             
+    rollup_service.apply(db, removed=[before], added=[rollup_service.sale_snapshot(sale)])
     db.commit()
     db.refresh(sale)
     return sale
@@ -144,6 +209,7 @@ def unpay_sale(sale_id: int, db: Session = Depends(get_db), current_user: models
     sale = s_query.first()
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
+    before = rollup_service.sale_snapshot(sale)
     
     amount_to_revert = sale.paid_amount
     sale.paid_amount = 0.0
@@ -158,12 +224,16 @@ def unpay_sale(sale_id: int, db: Session = Depends(get_db), current_user: models
             customer.current_balance -= amount_to_revert
             db.add(customer)
             
+    rollup_service.apply(db, removed=[before], added=[rollup_service.sale_snapshot(sale)])
     db.commit()
     db.refresh(sale)
     return sale
 
 @router.put("/{sale_id}")
 def update_sale(sale_id: int, sale_update: schemas.SaleUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    return _with_stock_retries(db, lambda: _update_sale(sale_id, sale_update, db, current_user))
+
+def _update_sale(sale_id: int, sale_update: schemas.SaleUpdate, db: Session, current_user: models.User):
     s_query = db.query(models.Sale).filter(models.Sale.id == sale_id)
     if current_user.role != "root":
         s_query = s_query.filter(models.Sale.owner_id == current_user.id)
@@ -171,6 +241,8 @@ def update_sale(sale_id: int, sale_update: schemas.SaleUpdate, db: Session = Dep
     sale = s_query.first()
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
+    before = rollup_service.sale_snapshot(sale)
+    items_sold = before["items_sold"] if before else None
 
     # 1. Update Customer Name Reflection
     if sale_update.customer_name and sale_update.customer_name != sale.customer_name:
@@ -193,39 +265,25 @@ def update_sale(sale_id: int, sale_update: schemas.SaleUpdate, db: Session = Dep
     # 3. Update Items (Stock Adjustment)
     if sale_update.items is not None:
         # Revert old stock
-        for item in sale.items:
-            t_query = db.query(models.Trophy).filter(models.Trophy.id == item.trophy_id)
-            if current_user.role != "root":
-                t_query = t_query.filter(models.Trophy.owner_id == current_user.id)
-            trophy = t_query.first()
-            if trophy:
-                trophy.quantity += item.quantity
+        _release_stock(db, _requested_quantities(sale.items), current_user)
         
         # Remove old sale items
         db.query(models.SaleItem).filter(models.SaleItem.sale_id == sale_id).delete()
 
-        # Calculate new totals and apply new stock
+        # Re-read stock (now including the reverted quantities) and apply the new items
+        requested = _requested_quantities(sale_update.items)
+        trophies = _load_trophies(db, requested.keys(), current_user)
+        _check_stock(trophies, requested)
+        _reserve_stock(db, trophies, requested)
+
+        # Calculate new totals
         new_total_amount = 0.0
         new_total_cost = 0.0
         
         for item in sale_update.items:
-            t_query = db.query(models.Trophy).filter(models.Trophy.id == item.trophy_id)
-            if current_user.role != "root":
-                t_query = t_query.filter(models.Trophy.owner_id == current_user.id)
-            trophy = t_query.first()
-            if not trophy:
-                raise HTTPException(status_code=404, detail=f"Trophy {item.trophy_id} not found")
-            
-            if trophy.quantity < item.quantity:
-                 raise HTTPException(status_code=400, detail=f"Not enough stock for {trophy.name}. Available: {trophy.quantity}")
-
-            trophy.quantity -= item.quantity
-            
-            line_total = trophy.selling_price * item.quantity
-            line_cost = trophy.cost_price * item.quantity
-            
-            new_total_amount += line_total
-            new_total_cost += line_cost
+            trophy = trophies[item.trophy_id]
+            new_total_amount += trophy.selling_price * item.quantity
+            new_total_cost += trophy.cost_price * item.quantity
 
             new_sale_item = models.SaleItem(
                 sale_id=sale.id,
@@ -250,7 +308,11 @@ def update_sale(sale_id: int, sale_update: schemas.SaleUpdate, db: Session = Dep
 
         sale.total_amount = new_total_amount
         sale.total_profit = new_total_amount - new_total_cost
+        # The items changed even if the totals did not
+        sale.updated_at = datetime.utcnow()
+        items_sold = sum(requested.values())
 
+    rollup_service.apply(db, removed=[before], added=[rollup_service.sale_snapshot(sale, items_sold=items_sold)])
     db.commit()
     db.refresh(sale)
     return sale
@@ -265,15 +327,9 @@ def delete_sale(sale_id: int, db: Session = Depends(get_db), current_user: model
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
     
-    # 1. Revert stock
-    for item in sale.items:
-        t_query = db.query(models.Trophy).filter(models.Trophy.id == item.trophy_id)
-        if current_user.role != "root":
-            t_query = t_query.filter(models.Trophy.owner_id == current_user.id)
-        trophy = t_query.first()
-        if trophy:
-            trophy.quantity += item.quantity
-            db.add(trophy)
+    # 1. Revert stock and the daily rollup
+    _release_stock(db, _requested_quantities(sale.items), current_user)
+    rollup_service.apply(db, removed=[rollup_service.sale_snapshot(sale)])
     
     # 2. Revert customer balance
     if sale.customer_id:
@@ -289,6 +345,7 @@ def delete_sale(sale_id: int, db: Session = Depends(get_db), current_user: model
     # 3. Delete sale items and sale
     db.query(models.SaleItem).filter(models.SaleItem.sale_id == sale_id).delete()
     db.delete(sale)
+    db.add(models.SaleDeletion(sale_id=sale_id, owner_id=sale.owner_id))
     db.commit()
     return {"message": "Sale deleted and stock/ledger reverted successfully"}
 
@@ -301,10 +358,11 @@ def get_customers(db: Session = Depends(get_db), current_user: models.User = Dep
     customers = query.all()
     return [c[0] for c in customers if c[0]]
 
-@router.get("/", response_model=List[schemas.Sale])
+@router.get("/", response_model=Union[List[schemas.Sale], schemas.SalePage])
 def get_sales(
     skip: int = 0, 
     limit: int = 100, 
+    cursor: str = None,
     start_date: str = None, 
     end_date: str = None, 
     customer_name: str = None, 
@@ -313,7 +371,10 @@ def get_sales(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    query = db.query(models.Sale)
+    # Preload items and their trophies so a page costs a fixed number of queries
+    query = db.query(models.Sale).options(
+        selectinload(models.Sale.items).selectinload(models.SaleItem.trophy)
+    )
     if current_user.role != "root":
         query = query.filter(models.Sale.owner_id == current_user.id)
 
@@ -331,5 +392,10 @@ def get_sales(
     if invoice_number:
         query = query.filter(models.Sale.invoice_number.ilike(f"%{invoice_number}%"))
 
+    # Keyset mode: pass cursor (empty for the first page) to get {items, next_cursor}
+    if cursor is not None:
+        sales, next_cursor = paginate_newest_first(query, models.Sale.timestamp, models.Sale.id, cursor, limit)
+        return {"items": sales, "next_cursor": next_cursor}
+
     sales = query.order_by(models.Sale.timestamp.desc()).offset(skip).limit(limit).all()
     return sales
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Union
 import database
 import models
 import schemas
+from pagination import paginate_by_id
 
 from .auth import get_current_user
 
@@ -26,11 +27,16 @@ def create_vendor(vendor: schemas.VendorCreate, db: Session = Depends(database.g
     db.refresh(new_vendor)
     return new_vendor
 
-@router.get("/", response_model=List[schemas.Vendor])
-def read_vendors(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db), current_user: models.User = Depends(get_current_user)):
+@router.get("/", response_model=Union[List[schemas.Vendor], schemas.VendorPage])
+def read_vendors(skip: int = 0, limit: int = 100, cursor: str = None, db: Session = Depends(database.get_db), current_user: models.User = Depends(get_current_user)):
     query = db.query(models.Vendor)
     if current_user.role != "root":
         query = query.filter(models.Vendor.owner_id == current_user.id)
+    # Keyset mode: pass cursor (empty for the first page) to get {items, next_cursor}
+    if cursor is not None:
+        vendors, next_cursor = paginate_by_id(query, models.Vendor.id, cursor, limit)
+        return {"items": vendors, "next_cursor": next_cursor}
+
     vendors = query.offset(skip).limit(limit).all()
     return vendors
 
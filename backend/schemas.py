@@ -25,6 +25,10 @@ class Trophy(TrophyBase):
     class Config:
         orm_mode = True
 
+class TrophyPage(BaseModel):
+    items: List[Trophy]
+    next_cursor: Optional[str] = None
+
 # --- Customer Schemas ---
 class CustomerBase(BaseModel):
     name: str
@@ -45,6 +49,10 @@ class Customer(CustomerBase):
     class Config:
         orm_mode = True
 
+class CustomerPage(BaseModel):
+    items: List[Customer]
+    next_cursor: Optional[str] = None
+
 # --- Sales Schemas ---
 class SaleItemCreate(BaseModel):
     trophy_id: int
@@ -89,6 +97,10 @@ class Sale(BaseModel):
     class Config:
         orm_mode = True
 
+class SalePage(BaseModel):
+    items: List[Sale]
+    next_cursor: Optional[str] = None
+
 # --- Vendor Schemas ---
 class VendorBase(BaseModel):
     name: str
@@ -109,6 +121,10 @@ class Vendor(VendorBase):
     class Config:
         orm_mode = True
 
+class VendorPage(BaseModel):
+    items: List[Vendor]
+    next_cursor: Optional[str] = None
+
 # --- Purchase Schemas ---
 class PurchaseItemCreate(BaseModel):
     trophy_id: int
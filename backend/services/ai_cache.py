@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
+from services.cache_service import TTLCache
+
+# AI completion cache.
+# Completions are keyed by a SHA-256 of the model and the normalized messages
+# (roles lower-cased, whitespace runs collapsed), so the same dashboard prompt
+# re-indented or re-sent from another tab is one entry. Entries live in an
+# in-process TTL + LRU cache and, when AI_CACHE_DB is set, in a SQLite file
+# that survives restarts and is shared by every worker process. Concurrent
+# identical requests wait on one upstream call instead of each making their
+# own. Only real provider answers are cached, never fallbacks.
+
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "256"))
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", "600"))
+# Path of the persistent cache; empty keeps completions in memory only
+AI_CACHE_DB = os.getenv("AI_CACHE_DB", "")
+AI_CACHE_DB_ROWS = int(os.getenv("AI_CACHE_DB_ROWS", "10000"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    return [{"role": m["role"].strip().lower(), "content": _WHITESPACE.sub(" ", m["content"]).strip()}
+            for m in messages]
+
+def completion_key(model: str, messages: List[Dict[str, str]], **params) -> str:
+    payload = {"model": model, "messages": normalize_messages(messages), "params": params}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+class CompletionStore:
+    """SQLite table of completions with a wall-clock expiry; the least recently used rows go first."""
+    def __init__(self, path: str, max_rows: int = AI_CACHE_DB_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_completions ("
+                "key TEXT PRIMARY KEY, completion TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_ai_completions_last_used ON ai_completions (last_used)")
+            self._ready = True
+        return conn
+
+    def get(self, key: str) -> Optional[tuple]:
+        """(completion, expires_at) if stored and not expired."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT completion, expires_at FROM ai_completions WHERE key = ? AND expires_at > ?",
+                                   (key, now)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE ai_completions SET last_used = ? WHERE key = ?", (now, key))
+            return row
+        finally:
+            conn.close()
+
+    def set(self, key: str, completion: str, expires_at: float):
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO ai_completions VALUES (?, ?, ?, ?)", (key, completion, expires_at, now))
+                conn.execute("DELETE FROM ai_completions WHERE expires_at <= ?", (now,))
+                conn.execute(
+                    "DELETE FROM ai_completions WHERE key IN ("
+                    "SELECT key FROM ai_completions ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_rows,)
+                )
+        finally:
+            conn.close()
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM ai_completions")
+        finally:
+            conn.close()
+
+class CompletionCache:
+    def __init__(self, maxsize: int = AI_CACHE_SIZE, ttl: float = AI_CACHE_TTL, path: str = AI_CACHE_DB):
+        self.ttl = ttl
+        # key -> (completion, wall-clock expiry), so an entry loaded from disk keeps its original deadline
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.store = CompletionStore(path) if path else None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.store_hits = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self.memory.get(key)
+        if entry is not None and entry[1] > time.time():
+            return entry[0]
+        if self.store is None:
+            return None
+        try:
+            entry = await run_in_threadpool(self.store.get, key)
+        except sqlite3.Error as e:
+            print(f"[AI cache] Store read failed: {e}")
+            return None
+        if entry is None:
+            return None
+        self.store_hits += 1
+        self.memory.set(key, entry)
+        return entry[0]
+
+    async def set(self, key: str, completion: str):
+        expires_at = time.time() + self.ttl
+        self.memory.set(key, (completion, expires_at))
+        if self.store is not None:
+            try:
+                await run_in_threadpool(self.store.set, key, completion, expires_at)
+            except sqlite3.Error as e:
+                print(f"[AI cache] Store write failed: {e}")
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[str]]) -> str:
+        """
+        The cached completion for `key`, or the result of `fetch()`, which is then cached.
+        Callers asking for a key already being fetched share that call (and its error).
+        """
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+        else:
+            pending = asyncio.ensure_future(self._fetch(key, fetch))
+            # Mark the error retrieved even if every waiter was cancelled
+            pending.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._inflight[key] = pending
+        # Shielded: a caller that goes away (closed tab) does not cancel the others' upstream call
+        return await asyncio.shield(pending)
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[str]]) -> str:
+        try:
+            self.upstream_calls += 1
+            completion = await fetch()
+            await self.set(key, completion)
+            return completion
+        finally:
+            del self._inflight[key]
+
+    def clear(self):
+        self.memory.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> dict:
+        return {
+            **self.memory.stats(),
+            "persistent": self.store is not None,
+            "store_hits": self.store_hits,
+            "coalesced": self.coalesced,
+            "upstream_calls": self.upstream_calls,
+            "in_flight": len(self._inflight),
+        }
+
+completion_cache = CompletionCache()
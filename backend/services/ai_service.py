@@ -2,8 +2,9 @@ import httpx
 import os
 import json
 import logging
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 from dotenv import load_dotenv
+from services.ai_cache import completion_cache, completion_key
 
 # Look for .env in current and parent directories
 load_dotenv(override=True)
@@ -11,8 +12,28 @@ load_dotenv(override=True)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# One pooled client per process: completions reuse kept-alive (HTTP/2 when
+# the h2 package is installed) connections instead of paying a TCP + TLS
+# handshake each time.
+AI_MAX_CONNECTIONS = int(os.getenv("AI_MAX_CONNECTIONS", "20"))
+AI_MAX_KEEPALIVE = int(os.getenv("AI_MAX_KEEPALIVE", "10"))
+AI_KEEPALIVE_EXPIRY = float(os.getenv("AI_KEEPALIVE_EXPIRY", "60"))
+AI_HTTP2 = os.getenv("AI_HTTP2", "on").lower() not in ("0", "off", "false", "no")
+# Completions can take a while to generate; everything else should be quick
+AI_TIMEOUT = float(os.getenv("AI_TIMEOUT", "30"))
+AI_CONNECT_TIMEOUT = float(os.getenv("AI_CONNECT_TIMEOUT", "5"))
+AI_POOL_TIMEOUT = float(os.getenv("AI_POOL_TIMEOUT", "5"))
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
 class AIService:
     def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
         self.api_key = os.getenv("GROK_API_KEY")
         self.fallback_provider = os.getenv("FALLBACK_AI_PROVIDER", "mock").lower()
         
@@ -25,18 +46,56 @@ class AIService:
             self.provider = "xai"
             self.base_url = "https://api.x.ai/v1/chat/completions"
             self.default_model = "grok-beta"
+        self.temperature = 0.7
         
         logger.info(f"AIService initialized. Provider: {self.provider}, Key present: {bool(self.api_key)}")
         if self.api_key:
             logger.info(f"Key starts with: {self.api_key[:4]}")
 
-    async def get_chat_completion(self, messages: List[Dict[str, str]], fallback_on_error: bool = True) -> str:
+    async def start(self, **client_options):
+        """Create the shared HTTP client (main.lifespan). `client_options` override httpx defaults."""
+        if self._client is None:
+            self._client = self._new_client(**client_options)
+
+    async def aclose(self):
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    def _new_client(self, **client_options) -> httpx.AsyncClient:
+        http2 = AI_HTTP2 and _http2_available()
+        if AI_HTTP2 and not http2:
+            logger.warning("AI_HTTP2 is on but the h2 package is missing; using HTTP/1.1 keep-alive")
+        options = {
+            "http2": http2,
+            "limits": httpx.Limits(
+                max_connections=AI_MAX_CONNECTIONS,
+                max_keepalive_connections=AI_MAX_KEEPALIVE,
+                keepalive_expiry=AI_KEEPALIVE_EXPIRY,
+            ),
+            "timeout": httpx.Timeout(AI_TIMEOUT, connect=AI_CONNECT_TIMEOUT, pool=AI_POOL_TIMEOUT),
+        }
+        options.update(client_options)
+        return httpx.AsyncClient(**options)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Scripts and tests that skip the lifespan get a client on first use
+        if self._client is None:
+            self._client = self._new_client()
+        return self._client
+
+    async def get_chat_completion(self, messages: List[Dict[str, str]], fallback_on_error: bool = True,
+                                  cache: bool = True) -> str:
         """
         Get a chat completion from the configured AI provider with an optional fallback.
+        With `cache`, identical prompts are answered from the completion cache (see ai_cache).
         """
         if self.api_key and "your_" not in self.api_key:
             try:
-                logger.info(f"Attempting to get completion from {self.provider}...")
+                if cache:
+                    key = completion_key(f"{self.base_url}:{self.default_model}", messages, temperature=self.temperature)
+                    return await completion_cache.get_or_fetch(key, lambda: self._call_provider(messages))
                 return await self._call_provider(messages)
             except Exception as e:
                 logger.error(f"{self.provider} API failed: {str(e)}")
@@ -47,23 +106,66 @@ class AIService:
             logger.warning(f"{self.provider.capitalize()} API key not set or invalid. Using fallback.")
             return await self._handle_fallback(messages, f"{self.provider.capitalize()} API key missing")
 
-    async def _call_provider(self, messages: List[Dict[str, str]]) -> str:
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        payload = {
-            "model": self.default_model,
-            "messages": messages,
-            "stream": False,
-            "temperature": 0.7
+    async def stream_chat_completion(self, messages: List[Dict[str, str]],
+                                     fallback_on_error: bool = True) -> AsyncIterator[str]:
+        """
+        Yield the completion piece by piece as the provider generates it.
+        Falls back like get_chat_completion, but only if nothing was sent yet; a
+        provider failure mid-answer is raised. Closing the generator (the client
+        went away) closes the upstream response, which stops the generation.
+        """
+        if not (self.api_key and "your_" not in self.api_key):
+            logger.warning(f"{self.provider.capitalize()} API key not set or invalid. Using fallback.")
+            yield await self._handle_fallback(messages, f"{self.provider.capitalize()} API key missing")
+            return
+
+        sent = False
+        try:
+            async for token in self._stream_provider(messages):
+                sent = True
+                yield token
+        except Exception as e:
+            logger.error(f"{self.provider} streaming API failed: {str(e)}")
+            if sent or not fallback_on_error:
+                raise
+            yield await self._handle_fallback(messages, error_msg=str(e))
+
+    def _request(self, messages: List[Dict[str, str]], stream: bool) -> dict:
+        return {
+            "headers": {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_key}"
+            },
+            "json": {
+                "model": self.default_model,
+                "messages": messages,
+                "stream": stream,
+                "temperature": self.temperature
+            },
         }
-        
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(self.base_url, headers=headers, json=payload)
+
+    async def _call_provider(self, messages: List[Dict[str, str]]) -> str:
+        logger.info(f"Attempting to get completion from {self.provider}...")
+        response = await self.client.post(self.base_url, **self._request(messages, stream=False))
+        response.raise_for_status()
+        data = response.json()
+        return data["choices"][0]["message"]["content"]
+
+    async def _stream_provider(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        # OpenAI-style SSE: "data: {chunk}" lines, each carrying a choices[0].delta, then "data: [DONE]"
+        logger.info(f"Streaming completion from {self.provider}...")
+        async with self.client.stream("POST", self.base_url, **self._request(messages, stream=True)) as response:
             response.raise_for_status()
-            data = response.json()
-            return data["choices"][0]["message"]["content"]
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    yield content
 
     async def _handle_fallback(self, messages: List[Dict[str, str]], reason: str = "", error_msg: str = "") -> str:
         logger.info(f"Falling back to {self.fallback_provider}. Reason: {reason or error_msg}")
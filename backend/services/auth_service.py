@@ -1,5 +1,7 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Any
+from typing import NamedTuple, Optional, Any
 from jose import jwt
 from passlib.context import CryptContext
 import os
@@ -19,6 +21,19 @@ if not hasattr(bcrypt, "__about__"):
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# A bcrypt check burns ~250 ms of CPU. Async callers run it on this bounded
+# pool, so a burst of logins queues here instead of stalling the event loop
+# or filling Starlette's shared threadpool.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+class Principal(NamedTuple):
+    """The authenticated user as request handlers see it (cached per token)."""
+    id: int
+    username: str
+    role: str
+    is_active: Optional[bool]
+
 class AuthService:
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -28,6 +43,20 @@ class AuthService:
     def get_password_hash(password: str) -> str:
         return pwd_context.hash(password)
 
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_pool, pwd_context.verify, plain_password, hashed_password)
+
+    @staticmethod
+    async def get_password_hash_async(password: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_pool, pwd_context.hash, password)
+
+    @staticmethod
+    def shutdown():
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+
     @staticmethod
     def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
         to_encode = data.copy()
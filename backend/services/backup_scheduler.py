@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, date, timedelta
+from typing import Optional
+import backup_service
+
+# Daily backup scheduler.
+# A daemon thread runs backup_service.run_backup once a day at
+# BACKUP_TIME (local time, HH:MM). The outcome of every run, with its duration
+# and output size, is kept in exports/backup_state.json next to the backups,
+# so a restart after today's backup does not run it again, and a server that
+# was down at BACKUP_TIME catches up as soon as it starts. Startup never waits
+# for a backup.
+
+BACKUP_TIME = os.getenv("BACKUP_TIME", "02:00")
+BACKUP_SCHEDULER_ENABLED = os.getenv("BACKUP_SCHEDULER", "on").lower() not in ("0", "off", "false", "no")
+BACKUP_HISTORY = int(os.getenv("BACKUP_HISTORY", "30"))
+BACKUP_RETRY_SECONDS = int(os.getenv("BACKUP_RETRY_SECONDS", "900"))
+# A lock older than this was left behind by a crashed process
+BACKUP_LOCK_STALE_SECONDS = 6 * 3600
+
+def _parse_time(value: str):
+    hour, minute = value.split(":")
+    return datetime.strptime(f"{int(hour):02d}:{int(minute):02d}", "%H:%M").time()
+
+class BackupScheduler:
+    def __init__(self, run_at: str = BACKUP_TIME, history: int = BACKUP_HISTORY):
+        self.run_at = _parse_time(run_at)
+        self.history = history
+        self.running = False
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    # --- State file ---
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(backup_service.EXPORT_BASE_DIR, "exports", "backup_state.json")
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"last_success_date": None, "runs": []}
+
+    def _save_state(self, state: dict):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=2, default=str)
+        os.replace(tmp, self.state_path)
+
+    # --- Scheduling ---
+
+    def next_run(self, now: Optional[datetime] = None) -> datetime:
+        """When the next backup is due: now if today's is outstanding, else BACKUP_TIME tomorrow."""
+        now = now or datetime.now()
+        today_at = datetime.combine(now.date(), self.run_at)
+        if self._load_state().get("last_success_date") == now.date().isoformat():
+            return today_at + timedelta(days=1)
+        return max(today_at, now)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="backup-scheduler", daemon=True)
+        self._thread.start()
+        print(f"[Backup] Scheduler started, next run at {self.next_run():%Y-%m-%d %H:%M}")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop scheduling. A backup already in progress is left to finish on its daemon thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            wait = (self.next_run() - datetime.now()).total_seconds()
+            if wait <= 0:
+                run = self.run_once()
+                if run is None or run["status"] != "success":
+                    # Failed, or another process holds the lock: check again later
+                    self._stop.wait(BACKUP_RETRY_SECONDS)
+                continue
+            # Re-check at least hourly so clock changes and manual runs are picked up
+            self._stop.wait(min(wait, 3600))
+
+    # --- Running ---
+
+    def run_once(self, force: bool = False) -> Optional[dict]:
+        """
+        Run the backup now unless today's already succeeded (or another run holds the lock).
+        Returns the recorded run, or None if it was skipped.
+        """
+        today = date.today().isoformat()
+        if not force and self._load_state().get("last_success_date") == today:
+            return None
+        with self._lock:
+            if self.running:
+                return None
+            try:
+                if not self._acquire_file_lock():
+                    return None
+            except OSError as e:
+                # e.g. the exports directory cannot be created: a failed run, retried later
+                return self._record(today, datetime.now(), 0.0, {"status": "error", "message": f"Backup lock unavailable: {e}"})
+            self.running = True
+        try:
+            return self._run(today)
+        finally:
+            self._release_file_lock()
+            with self._lock:
+                self.running = False
+
+    def _run(self, today: str) -> dict:
+        started_at = datetime.now()
+        start = time.perf_counter()
+        try:
+            result = backup_service.run_backup()
+        except Exception as e:
+            result = {"status": "error", "message": str(e)}
+        return self._record(today, started_at, time.perf_counter() - start, result)
+
+    def _record(self, today: str, started_at: datetime, duration: float, result: dict) -> dict:
+        run = {
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "duration_seconds": round(duration, 2),
+            "size_bytes": result.get("size_bytes", 0),
+            **result,
+        }
+        state = self._load_state()
+        if result.get("status") == "success":
+            state["last_success_date"] = today
+        state["runs"] = (state.get("runs", []) + [run])[-self.history:]
+        try:
+            self._save_state(state)
+        except OSError as e:
+            print(f"[Backup] Could not save backup state: {e}")
+        print(f"[Backup] {run['status']} in {run['duration_seconds']}s, {run['size_bytes'] / 1e6:.1f} MB")
+        return run
+
+    # Several worker processes each run a scheduler; the lock file lets only one back up at a time
+
+    @property
+    def _lock_path(self) -> str:
+        return os.path.join(backup_service.EXPORT_BASE_DIR, "exports", "backup.lock")
+
+    def _acquire_file_lock(self) -> bool:
+        os.makedirs(os.path.dirname(self._lock_path), exist_ok=True)
+        try:
+            if time.time() - os.path.getmtime(self._lock_path) > BACKUP_LOCK_STALE_SECONDS:
+                os.remove(self._lock_path)
+        except OSError:
+            pass
+        try:
+            os.close(os.open(self._lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            return False
+
+    def _release_file_lock(self):
+        try:
+            os.remove(self._lock_path)
+        except OSError:
+            pass
+
+    def status(self) -> dict:
+        state = self._load_state()
+        return {
+            "enabled": self._thread is not None,
+            "running": self.running,
+            "run_at": self.run_at.strftime("%H:%M"),
+            "next_run": self.next_run(),
+            "last_success_date": state.get("last_success_date"),
+            "runs": state.get("runs", []),
+        }
+
+backup_scheduler = BackupScheduler()
@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import models
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache whose entries also expire after `ttl` seconds.
+    Hit/miss/eviction counters are kept for monitoring.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a result computed before a write is never stored after it
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, version: Optional[int] = None):
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]):
+        with self._lock:
+            self.version += 1
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        self.invalidate(lambda key: True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+# --- Analytics cache ---
+# Dashboard, sales trend and top-seller results keyed by
+# (owner scope, endpoint, normalized params). Root sees every owner's data,
+# so its entries share the ALL_OWNERS scope and are dropped by any write.
+
+ALL_OWNERS = "*"
+
+analytics_cache = TTLCache(
+    maxsize=int(os.getenv("ANALYTICS_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("ANALYTICS_CACHE_TTL", "60")),
+)
+
+def owner_scope(current_user) -> Hashable:
+    return ALL_OWNERS if current_user.role == "root" else current_user.id
+
+def cache_key(current_user, endpoint: str, **params) -> tuple:
+    return (owner_scope(current_user), endpoint, tuple(sorted(params.items())))
+
+def invalidate_owner(scope: Hashable):
+    if scope == ALL_OWNERS:
+        # Root can write to any owner's data
+        analytics_cache.clear()
+    else:
+        analytics_cache.invalidate(lambda key: key[0] in (scope, ALL_OWNERS))
+
+def track_writes(db: Session, current_user):
+    """Invalidate the writer's cached analytics whenever this session commits."""
+    db.info["cache_scope"] = owner_scope(current_user)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    scope = session.info.get("cache_scope")
+    if scope is not None:
+        invalidate_owner(scope)
+
+# --- Principal cache ---
+# Bearer token -> (Principal, token expiry), so authenticating a request
+# needs neither a JWT decode nor a users query while the entry lives. Any
+# committed change to a User clears it; changes made outside this process
+# (another worker, a maintenance script) show up within AUTH_CACHE_TTL.
+
+principal_cache = TTLCache(
+    maxsize=int(os.getenv("AUTH_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("AUTH_CACHE_TTL", "30")),
+)
+
+@event.listens_for(Session, "before_flush")
+def _note_user_changes(session, flush_context, instances):
+    if any(isinstance(obj, models.User) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["users_changed"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_principals_after_commit(session):
+    if session.info.pop("users_changed", False):
+        principal_cache.clear()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_user_changes(session):
+    session.info.pop("users_changed", None)
@@ -0,0 +1,192 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional, Sequence
+from openpyxl import Workbook
+from sqlalchemy import select
+import models
+from database import SessionLocal
+
+# Streaming exports.
+# Rows are read with a server-side cursor (yield_per) as plain tuples, never
+# as ORM objects, and encoded as they arrive: CSV goes out in blocks while
+# the query is still running, XLSX rows go into an openpyxl write-only
+# workbook (spooled to disk) that is then sent in blocks. Memory stays flat
+# however many rows an export has. Generators open their own session because
+# they run after the endpoint has returned.
+# Parquet and Arrow IPC (pyarrow, imported lazily) are written batch by batch
+# with a fixed schema derived from the column types.
+
+YIELD_PER = 5000
+STREAM_BLOCK = 64 * 1024
+
+def _inventory(owner_id: Optional[int]):
+    t = models.Trophy
+    stmt = select(t.id, t.name, t.sku, t.category, t.material, t.quantity,
+                  t.cost_price, t.selling_price, t.min_stock_level)
+    return stmt.where(t.owner_id == owner_id) if owner_id is not None else stmt
+
+def _sales(owner_id: Optional[int]):
+    s = models.Sale
+    stmt = select(s.id, s.timestamp, s.invoice_number, s.customer_id, s.customer_name, s.gstin,
+                  s.total_amount, s.tax_amount, s.total_profit, s.payment_status, s.paid_amount)
+    return stmt.where(s.owner_id == owner_id) if owner_id is not None else stmt
+
+def _purchases(owner_id: Optional[int]):
+    p = models.Purchase
+    stmt = select(p.id, p.timestamp, p.vendor_id, models.Vendor.name.label("vendor_name"), p.invoice_number,
+                  p.total_amount, p.payment_status, p.paid_amount, p.is_active
+                  ).outerjoin(models.Vendor, models.Vendor.id == p.vendor_id)
+    return stmt.where(p.owner_id == owner_id) if owner_id is not None else stmt
+
+def _customers(owner_id: Optional[int]):
+    c = models.Customer
+    stmt = select(c.id, c.name, c.mobile, c.email, c.address, c.current_balance)
+    return stmt.where(c.owner_id == owner_id) if owner_id is not None else stmt
+
+# dataset -> (statement builder, primary key to order by)
+DATASETS = {
+    "inventory": (_inventory, models.Trophy.id),
+    "sales": (_sales, models.Sale.id),
+    "purchases": (_purchases, models.Purchase.id),
+    "customers": (_customers, models.Customer.id),
+}
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+def check_format(fmt: str):
+    """Raise ValueError if `fmt` cannot be produced here (unknown, or pyarrow missing)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt in COLUMNAR_FORMATS:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError(f"The {fmt} format requires pyarrow to be installed")
+
+def columns(dataset: str) -> List[str]:
+    build, _ = DATASETS[dataset]
+    return [c.name for c in build(None).selected_columns]
+
+def iter_rows(dataset: str, owner_id: Optional[int]) -> Iterator[Sequence]:
+    """Rows of `dataset` for one owner (None: every owner), oldest first, YIELD_PER at a time."""
+    build, pk = DATASETS[dataset]
+    stmt = build(owner_id).order_by(pk).execution_options(yield_per=YIELD_PER)
+    db = SessionLocal()
+    try:
+        yield from db.execute(stmt)
+    finally:
+        db.close()
+
+def arrow_schema(dataset: str):
+    """pyarrow schema of `dataset`, so every batch (even an all-null one) has the same column types."""
+    import pyarrow as pa
+    build, _ = DATASETS[dataset]
+    types = {int: pa.int64(), float: pa.float64(), str: pa.string(), bool: pa.bool_(), datetime: pa.timestamp("us")}
+    return pa.schema([pa.field(c.name, types.get(c.type.python_type, pa.string())) for c in build(None).selected_columns])
+
+def _record_batches(dataset: str, owner_id: Optional[int]):
+    """YIELD_PER-row Arrow record batches of `dataset`."""
+    import pyarrow as pa
+    schema = arrow_schema(dataset)
+
+    def to_batch(rows):
+        return pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)], schema=schema)
+
+    rows = []
+    for row in iter_rows(dataset, owner_id):
+        rows.append(row)
+        if len(rows) == YIELD_PER:
+            yield to_batch(rows)
+            rows = []
+    if rows:
+        yield to_batch(rows)
+
+def _send_file(path: str) -> Iterator[bytes]:
+    try:
+        with open(path, "rb") as f:
+            while block := f.read(STREAM_BLOCK):
+                yield block
+    finally:
+        os.remove(path)
+
+def _spool(suffix: str, write: Callable[[str], None]) -> Iterator[bytes]:
+    """Write the export to a temp file with `write(path)`, then stream it; the file never outlives the export."""
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    try:
+        write(path)
+    except BaseException:
+        os.remove(path)
+        raise
+    yield from _send_file(path)
+
+def _cell(value):
+    # Excel has no timezone support and openpyxl rejects aware datetimes
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+def stream_csv(dataset: str, owner_id: Optional[int]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns(dataset))
+    for row in iter_rows(dataset, owner_id):
+        writer.writerow(row)
+        if buffer.tell() >= STREAM_BLOCK:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+def stream_xlsx(dataset: str, owner_id: Optional[int]) -> Iterator[bytes]:
+    # A zip can only be sent once complete; the write-only workbook keeps rows on disk until then
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(dataset)
+    sheet.append(columns(dataset))
+    for row in iter_rows(dataset, owner_id):
+        sheet.append([_cell(v) for v in row])
+
+    yield from _spool(".xlsx", workbook.save)
+
+def write_parquet(dataset: str, owner_id: Optional[int], path: str):
+    """One row group per batch, so only a batch is ever held in memory."""
+    import pyarrow.parquet as pq
+    with pq.ParquetWriter(path, arrow_schema(dataset), compression="zstd") as writer:
+        for batch in _record_batches(dataset, owner_id):
+            writer.write_batch(batch)
+
+def stream_parquet(dataset: str, owner_id: Optional[int]) -> Iterator[bytes]:
+    # The footer (row group index) comes last, so the file is spooled like xlsx
+    yield from _spool(".parquet", lambda path: write_parquet(dataset, owner_id, path))
+
+def stream_arrow(dataset: str, owner_id: Optional[int]) -> Iterator[bytes]:
+    """Arrow IPC stream format: each record batch is sent as soon as it is read."""
+    import pyarrow as pa
+    buffer = io.BytesIO()
+    with pa.ipc.new_stream(buffer, arrow_schema(dataset)) as writer:
+        for batch in _record_batches(dataset, owner_id):
+            writer.write_batch(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+STREAMERS = {
+    "csv": stream_csv,
+    "xlsx": stream_xlsx,
+    "parquet": stream_parquet,
+    "arrow": stream_arrow,
+}
+
+def filename(dataset: str, fmt: str) -> str:
+    return f"{dataset}_export.{FORMATS[fmt][1]}"
@@ -0,0 +1,153 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from database import SessionLocal
+from services import cache_service, import_service
+
+# Background imports.
+# The upload is copied to a temp file and handed to a small worker pool, which
+# commits after every unit (a parsed chunk, or a batch of purchase vendor
+# groups) and records progress the client polls. Jobs live in memory only:
+# they are not resumed after a restart, and a failed job keeps the units it
+# had already committed (rows_processed says how far it got).
+
+IMPORT_JOB_WORKERS = int(os.getenv("IMPORT_JOB_WORKERS", "2"))
+IMPORT_JOB_HISTORY = int(os.getenv("IMPORT_JOB_HISTORY", "100"))
+
+class ImportJob:
+    def __init__(self, owner_id: int, import_type: str, filename: str):
+        self.id = uuid.uuid4().hex
+        self.owner_id = owner_id
+        self.import_type = import_type
+        self.filename = filename
+        self.status = "queued"
+        self.rows_processed = 0
+        self.counts: Dict[str, int] = dict(import_service.EMPTY_COUNTS.get(import_type, {}))
+        self.errors: List[str] = []
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> dict:
+        elapsed = 0.0
+        if self._started is not None:
+            elapsed = (self._finished or time.monotonic()) - self._started
+        return {
+            "id": self.id,
+            "status": self.status,
+            "import_type": self.import_type,
+            "filename": self.filename,
+            "rows_processed": self.rows_processed,
+            "rows_per_second": round(self.rows_processed / elapsed, 1) if elapsed else 0.0,
+            "elapsed_seconds": round(elapsed, 2),
+            "counts": dict(self.counts),
+            "errors": list(self.errors),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+class ImportJobManager:
+    def __init__(self, workers: int = IMPORT_JOB_WORKERS, history: int = IMPORT_JOB_HISTORY):
+        self.workers = workers
+        self.history = history
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        # Jobs not picked up by a worker yet: job id -> (future, spool file)
+        self._queued: Dict[str, Tuple[Future, str]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fileobj: BinaryIO, filename: str, import_type: str, payment_status: str, current_user) -> ImportJob:
+        """Copy the upload aside and queue it. Blocking (file copy): call from a worker thread."""
+        suffix = os.path.splitext(filename)[1]
+        with tempfile.NamedTemporaryFile(prefix="import_", suffix=suffix, delete=False) as spool:
+            shutil.copyfileobj(fileobj, spool)
+
+        job = ImportJob(current_user.id, import_type, filename)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="import-job")
+            future = self._executor.submit(self._run, job, spool.name, payment_status, current_user)
+            self._queued[job.id] = (future, spool.name)
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self):
+        """Stop accepting work; queued jobs fail as cancelled, running ones finish their current unit."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            cancelled = [(self._jobs.get(job_id), path) for job_id, (future, path) in self._queued.items()
+                         if future.cancelled()]
+            self._queued.clear()
+        for job, path in cancelled:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            if job is not None:
+                job.errors.append("Cancelled: the server shut down before the import started")
+                job.finished_at, job._finished = datetime.utcnow(), time.monotonic()
+                job.status = "failed"
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: ImportJob, path: str, payment_status: str, current_user):
+        with self._lock:
+            self._queued.pop(job.id, None)
+        job.status = "running"
+        job.started_at, job._started = datetime.utcnow(), time.monotonic()
+        status = "failed"
+        db = SessionLocal()
+        cache_service.track_writes(db, current_user)
+        try:
+            with open(path, "rb") as upload:
+                chunks = import_service.read_chunks(upload, job.filename)
+                for rows, counts in import_service.iter_import(db, chunks, job.import_type, job.owner_id, payment_status):
+                    db.commit()
+                    with self._lock:
+                        job.rows_processed += rows
+                        import_service.add_counts(job.counts, counts)
+            status = "completed"
+        except import_service.ImportValidationError as e:
+            db.rollback()
+            job.errors.append(str(e))
+        except Exception as e:
+            db.rollback()
+            print(f"[Import] Job {job.id} failed: {e}")
+            # Driver errors carry the whole parameter batch; keep the first line
+            job.errors.append(f"Import failed: {str(e).splitlines()[0][:300]}")
+        finally:
+            try:
+                db.close()
+                os.remove(path)
+            finally:
+                job.finished_at, job._finished = datetime.utcnow(), time.monotonic()
+                # Last: a poller that sees a finished status also sees its finish time
+                job.status = status
+
+job_manager = ImportJobManager()
@@ -0,0 +1,581 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+import pandas as pd
+from openpyxl import load_workbook
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.orm import Session
+import models
+from services import rollup_service
+
+# Bulk spreadsheet imports.
+# Files are processed column-wise with pandas and written with set-based
+# statements: one query loads what already exists, the rows are split into
+# inserts and updates, and each group goes out as batched executemany calls
+# instead of one ORM round trip per row.
+# Uploads are parsed as a stream of CHUNK_ROWS-row frames, so peak memory
+# depends on the chunk size rather than on the file size. Purchase lines are
+# spooled to a temporary SQLite file on the way, since a vendor's group can
+# only be imported once every chunk has been read.
+
+BATCH_SIZE = 1000
+IMPORT_EXTENSIONS = ('.xlsx', '.xls', '.csv', '.parquet', '.arrow', '.feather')
+CHUNK_ROWS = int(os.getenv("IMPORT_CHUNK_ROWS", "10000"))
+
+INVENTORY_REQUIRED = ['name', 'sku', 'quantity', 'cost_price', 'selling_price']
+PURCHASE_REQUIRED = ['vendor_name', 'sku', 'quantity', 'unit_cost']
+PURCHASE_OPTIONAL = ['invoice_number', 'vendor_address', 'vendor_mobile', 'vendor_email',
+                     'product_name', 'selling_price', 'category', 'material']
+
+class ImportValidationError(ValueError):
+    """The uploaded file cannot be imported; the message is shown to the user."""
+
+def _batches(rows: List, size: int = BATCH_SIZE) -> Iterable[List]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def _numeric(df: pd.DataFrame, column: str, default=None, integer: bool = False) -> pd.Series:
+    """Coerce a whole column, rejecting the file if any cell is not a number."""
+    if column not in df.columns:
+        return pd.Series(default, index=df.index)
+    raw = df[column]
+    values = pd.to_numeric(raw, errors='coerce')
+    if default is not None:
+        values = values.where(raw.notna(), default)
+    invalid = values.isna()
+    if invalid.any():
+        first = int(invalid.idxmax())
+        raise ImportValidationError(f"Invalid value in column '{column}' at row {first + 2}: {raw[first]!r}")
+    return values.astype(int) if integer else values.astype(float)
+
+def _text(df: pd.DataFrame, column: str, default=None) -> pd.Series:
+    """String column with NaN as None; `default` fills a column the file does not have."""
+    if column not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    return df[column].astype(object).where(df[column].notna(), None)
+
+def read_chunks(fileobj: BinaryIO, filename: str, chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Parse an upload into frames of at most `chunksize` rows. The row index
+    keeps counting across chunks so errors can name the file row.
+    """
+    try:
+        if filename.endswith('.csv'):
+            yield from pd.read_csv(fileobj, chunksize=chunksize)
+        elif filename.endswith('.xlsx'):
+            yield from _xlsx_chunks(fileobj, chunksize)
+        elif filename.endswith(('.parquet', '.arrow', '.feather')):
+            yield from _arrow_chunks(fileobj, filename, chunksize)
+        else:
+            # Legacy .xls has no streaming reader
+            yield pd.read_excel(fileobj)
+    except ImportValidationError:
+        raise
+    except Exception as e:
+        raise ImportValidationError(f"Could not parse file: {str(e)}")
+
+def _arrow_chunks(fileobj: BinaryIO, filename: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Parquet row batches, or Arrow IPC (file or stream format) record batches."""
+    import pyarrow as pa
+    if filename.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(fileobj).iter_batches(batch_size=chunksize)
+    else:
+        try:
+            reader = pa.ipc.open_file(fileobj)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            fileobj.seek(0)
+            batches = iter(pa.ipc.open_stream(fileobj))
+
+    start = 0
+    for batch in batches:
+        # IPC batches are whatever size the writer chose; re-slice to chunksize
+        for offset in range(0, batch.num_rows, chunksize):
+            frame = batch.slice(offset, chunksize).to_pandas()
+            frame.index = range(start, start + len(frame))
+            start += len(frame)
+            yield frame
+
+def _xlsx_chunks(fileobj: BinaryIO, chunksize: int) -> Iterator[pd.DataFrame]:
+    """First sheet, first row as header, iterated row by row in read-only mode."""
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+        start, buffer = 0, []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            buffer.append(row[:len(columns)])
+            if len(buffer) == chunksize:
+                yield pd.DataFrame(buffer, columns=columns, index=range(start, start + len(buffer)))
+                start, buffer = start + len(buffer), []
+        if buffer or start == 0:
+            yield pd.DataFrame(buffer, columns=columns, index=range(start, start + len(buffer)))
+    finally:
+        workbook.close()
+
+def _identifier(value) -> Optional[str]:
+    """
+    Text of an ID cell (SKU, invoice number). Integral floats lose their ".0":
+    chunked parsing infers dtypes per chunk, so an integer column reads as
+    float in any chunk that has a blank cell.
+    """
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def _lookup_ids(db: Session, model, key_col, owner_id: int, keys: List) -> Dict:
+    """
+    {key: id} for the owner's rows whose `key_col` is in `keys`, the oldest row
+    winning when a key repeats. There is deliberately no ORDER BY: with a long
+    IN list SQLite would walk the owner index in id order instead of seeking
+    (owner_id, key).
+    """
+    ids: Dict = {}
+    for batch in _batches(keys):
+        for key, row_id in db.execute(
+            select(key_col, model.id).where(model.owner_id == owner_id, key_col.in_(batch))
+        ):
+            if key not in ids or row_id < ids[key]:
+                ids[key] = row_id
+    return ids
+
+def check_columns(df: pd.DataFrame, required: List[str], label: str = "Missing required column"):
+    for col in required:
+        if col not in df.columns:
+            raise ImportValidationError(f"{label}: {col}")
+
+def import_inventory(db: Session, df: pd.DataFrame, owner_id: int) -> Dict[str, int]:
+    """
+    Insert new SKUs and overwrite existing ones for `owner_id`.
+    Rows repeating a SKU collapse to the last occurrence. Does not commit.
+    """
+    check_columns(df, INVENTORY_REQUIRED)
+    if df['sku'].isna().any():
+        raise ImportValidationError(f"Missing value in column 'sku' at row {int(df['sku'].isna().idxmax()) + 2}")
+
+    frame = pd.DataFrame({
+        "owner_id": owner_id,
+        "name": _text(df, 'name'),
+        "sku": [_identifier(v) for v in df['sku']],
+        "quantity": _numeric(df, 'quantity', integer=True),
+        "cost_price": _numeric(df, 'cost_price'),
+        "selling_price": _numeric(df, 'selling_price'),
+        "category": _text(df, 'category'),
+        "material": _text(df, 'material'),
+        "min_stock_level": _numeric(df, 'min_stock_level', default=5, integer=True),
+    }).drop_duplicates(subset="sku", keep="last")
+
+    existing = _lookup_ids(db, models.Trophy, models.Trophy.sku, owner_id, list(frame["sku"]))
+
+    is_update = frame["sku"].isin(existing.keys())
+    inserts = frame[~is_update]
+    updates = frame[is_update].assign(_id=frame.loc[is_update, "sku"].map(existing))
+
+    table = models.Trophy.__table__
+    for batch in _batches(inserts.to_dict("records")):
+        db.execute(table.insert(), batch)
+
+    # Bind names must not collide with column names in an UPDATE, hence the "new_" prefix
+    fields = [c for c in frame.columns if c not in ("owner_id", "sku")]
+    update_stmt = table.update().where(table.c.id == bindparam("_id")).values(
+        # Bump the version so concurrent ORM writers holding a stale row get a conflict
+        {**{f: bindparam(f"new_{f}") for f in fields}, "version": table.c.version + 1}
+    )
+    updates = updates[["_id", *fields]].rename(columns={f: f"new_{f}" for f in fields})
+    for batch in _batches(updates.to_dict("records")):
+        db.execute(update_stmt, batch)
+
+    return {"imported": len(inserts), "updated": len(updates)}
+
+def _is_blank(val) -> bool:
+    return val is None or pd.isna(val) or str(val).strip() == ""
+
+def _content_hashes(lines: pd.DataFrame, invoices: Dict[str, Optional[str]]) -> pd.Series:
+    """
+    Duplicate-detection hash per vendor group. The payload is byte-for-byte the
+    json.dumps({"vendor", "items", "invoice"}, sort_keys=True) earlier imports
+    stored, built from per-line fragments instead of one dict per row.
+    """
+    fragments = pd.Series([
+        json.dumps({"sku": sku, "qty": qty, "cost": cost}, sort_keys=True)
+        for sku, qty, cost in zip(lines["sku"], lines["quantity"], lines["unit_cost"])
+    ], index=lines.index)
+    by_sku = fragments.loc[lines.sort_values(["vendor_name", "sku"], kind="stable").index]
+    items = by_sku.groupby(lines["vendor_name"], sort=True).agg(", ".join)
+
+    return pd.Series({
+        vendor: hashlib.sha256(
+            f'{{"invoice": {json.dumps(invoices[vendor])}, "items": [{joined}], "vendor": {json.dumps(vendor)}}}'.encode()
+        ).hexdigest()
+        for vendor, joined in items.items()
+    })
+
+def _restock(db: Session, purchase_ids: List[int], owner_id: int):
+    """Add the items of re-activated purchases back to stock."""
+    added: Dict[int, int] = {}
+    for batch in _batches(purchase_ids):
+        for trophy_id, quantity in db.execute(
+            select(models.PurchaseItem.trophy_id, func.sum(models.PurchaseItem.quantity))
+            .where(models.PurchaseItem.purchase_id.in_(batch))
+            .group_by(models.PurchaseItem.trophy_id)
+        ):
+            added[trophy_id] = added.get(trophy_id, 0) + (quantity or 0)
+
+    table = models.Trophy.__table__
+    stmt = table.update().where(
+        table.c.id == bindparam("_id"), table.c.owner_id == owner_id
+    ).values(quantity=table.c.quantity + bindparam("added"), version=table.c.version + 1)
+    for batch in _batches([{"_id": t, "added": q} for t, q in added.items()]):
+        db.execute(stmt, batch)
+
+def import_purchases(db: Session, df: pd.DataFrame, owner_id: int, payment_status: str = "Due") -> Dict[str, int]:
+    """
+    One purchase per vendor_name group. Groups whose content hash matches an
+    active purchase are skipped, a soft-deleted match is restored, anything
+    else creates the purchase, its vendor/trophies if missing, and stock.
+    Does not commit.
+    """
+    check_columns(df, PURCHASE_REQUIRED, "Missing required column for purchase")
+    df = df[df['vendor_name'].notna()]
+
+    # File order within a vendor, vendors in sorted order: the order stock and costs are applied in
+    lines = pd.DataFrame({
+        "vendor_name": df['vendor_name'],
+        "sku": [str(v) for v in df['sku']],
+        "quantity": _numeric(df, 'quantity', integer=True),
+        "unit_cost": _numeric(df, 'unit_cost'),
+        "invoice_number": _text(df, 'invoice_number'),
+        "vendor_address": _text(df, 'vendor_address'),
+        "vendor_mobile": _text(df, 'vendor_mobile'),
+        "vendor_email": _text(df, 'vendor_email'),
+        "product_name": _text(df, 'product_name'),
+        "selling_price": _numeric(df, 'selling_price', default=0.0),
+        "category": _text(df, 'category', default='Uncategorized'),
+        "material": _text(df, 'material', default='Unknown'),
+    }).sort_values("vendor_name", kind="stable")
+
+    firsts = lines.drop_duplicates("vendor_name").set_index("vendor_name")
+    invoices = {vendor: None if v is None else str(v) for vendor, v in firsts["invoice_number"].items()}
+    hashes = _content_hashes(lines, invoices)
+
+    # 1. Duplicates and soft-deleted purchases, by content hash
+    existing: Dict[str, models.Purchase] = {}
+    for batch in _batches(list(hashes)):
+        for purchase in db.query(models.Purchase).filter(
+            models.Purchase.owner_id == owner_id,
+            models.Purchase.content_hash.in_(batch)
+        ):
+            if purchase.content_hash not in existing or purchase.id < existing[purchase.content_hash].id:
+                existing[purchase.content_hash] = purchase
+
+    skipped, restocked, new_vendors = 0, [], []
+    for vendor_name, content_hash in hashes.items():
+        purchase = existing.get(content_hash)
+        if purchase is None:
+            new_vendors.append(vendor_name)
+        elif purchase.is_active:
+            skipped += 1
+        else:
+            purchase.is_active = True
+            if purchase.stock_reverted:
+                restocked.append(purchase.id)
+                purchase.stock_reverted = False
+    _restock(db, restocked, owner_id)
+    restored = len(hashes) - len(new_vendors) - skipped
+
+    if not new_vendors:
+        return {"created": 0, "restored": restored, "skipped_duplicates": skipped}
+
+    lines = lines[lines["vendor_name"].isin(new_vendors)]
+    lines = lines.assign(line_total=lines["quantity"] * lines["unit_cost"])
+    totals = lines.groupby("vendor_name", sort=True)["line_total"].sum()
+
+    # 2. Vendors: update contact details from each group's first row, create missing ones
+    vendor_ids = _lookup_ids(db, models.Vendor, models.Vendor.name, owner_id, new_vendors)
+
+    vendor_rows = []
+    for vendor_name in new_vendors:
+        first = firsts.loc[vendor_name]
+        vendor_rows.append({
+            "name": vendor_name,
+            "address": None if _is_blank(first["vendor_address"]) else first["vendor_address"],
+            "mobile": None if _is_blank(first["vendor_mobile"]) else str(first["vendor_mobile"]),
+            "email": None if _is_blank(first["vendor_email"]) else first["vendor_email"],
+            # Due: we owe the vendor (decrease balance); Paid: payment already made
+            "due": float(totals[vendor_name]) if payment_status == "Due" else 0.0,
+        })
+
+    vendor_table = models.Vendor.__table__
+    update_vendor = vendor_table.update().where(vendor_table.c.id == bindparam("_id")).values(
+        address=func.coalesce(bindparam("new_address"), vendor_table.c.address),
+        mobile=func.coalesce(bindparam("new_mobile"), vendor_table.c.mobile),
+        email=func.coalesce(bindparam("new_email"), vendor_table.c.email),
+        current_balance=func.coalesce(vendor_table.c.current_balance, 0.0) - bindparam("due"),
+    )
+    for batch in _batches([
+        {"_id": vendor_ids[v["name"]], "new_address": v["address"], "new_mobile": v["mobile"],
+         "new_email": v["email"], "due": v["due"]}
+        for v in vendor_rows if v["name"] in vendor_ids
+    ]):
+        db.execute(update_vendor, batch)
+
+    insert_vendor = vendor_table.insert().returning(vendor_table.c.name, vendor_table.c.id)
+    for batch in _batches([
+        {"owner_id": owner_id, "name": v["name"], "address": v["address"], "mobile": v["mobile"],
+         "email": v["email"], "current_balance": -v["due"]}
+        for v in vendor_rows if v["name"] not in vendor_ids
+    ]):
+        for name, vendor_id in db.execute(insert_vendor, batch):
+            vendor_ids[name] = vendor_id
+
+    # 3. Trophies: add stock and take the latest cost; create unknown SKUs
+    trophy_table = models.Trophy.__table__
+    per_sku = lines.groupby("sku", sort=False).agg(
+        quantity=("quantity", "sum"), unit_cost=("unit_cost", "last")
+    )
+    trophy_ids = _lookup_ids(db, models.Trophy, models.Trophy.sku, owner_id, list(per_sku.index))
+
+    known = per_sku.index.isin(list(trophy_ids))
+    restock_stmt = trophy_table.update().where(trophy_table.c.id == bindparam("_id")).values(
+        quantity=trophy_table.c.quantity + bindparam("added"),
+        cost_price=bindparam("new_cost"),
+        version=trophy_table.c.version + 1
+    )
+    for batch in _batches([
+        {"_id": trophy_ids[sku], "added": int(quantity), "new_cost": float(cost)}
+        for sku, quantity, cost in zip(per_sku.index[known], per_sku["quantity"][known], per_sku["unit_cost"][known])
+    ]):
+        db.execute(restock_stmt, batch)
+
+    product = lines.drop_duplicates("sku").set_index("sku")
+    new_trophies = [{
+        "owner_id": owner_id,
+        "name": product.at[sku, "product_name"] or f"New Item {sku}",
+        "sku": sku,
+        "quantity": int(quantity),
+        "cost_price": float(cost),
+        "selling_price": float(product.at[sku, "selling_price"]),
+        "category": product.at[sku, "category"],
+        "material": product.at[sku, "material"],
+    } for sku, quantity, cost in zip(per_sku.index[~known], per_sku["quantity"][~known], per_sku["unit_cost"][~known])]
+    for batch in _batches(new_trophies):
+        for sku, trophy_id in db.execute(trophy_table.insert().returning(trophy_table.c.sku, trophy_table.c.id), batch):
+            trophy_ids[sku] = trophy_id
+
+    # 4. Purchases and their items
+    purchase_table = models.Purchase.__table__
+    purchase_ids: Dict[int, int] = {}
+    for batch in _batches([{
+        "owner_id": owner_id,
+        "vendor_id": vendor_ids[vendor_name],
+        "total_amount": float(totals[vendor_name]),
+        "is_active": True,
+        "content_hash": hashes[vendor_name],
+        "invoice_number": invoices[vendor_name],
+        "payment_status": payment_status,
+    } for vendor_name in new_vendors]):
+        for vendor_id, purchase_id in db.execute(
+            purchase_table.insert().returning(purchase_table.c.vendor_id, purchase_table.c.id), batch
+        ):
+            purchase_ids[vendor_id] = purchase_id
+
+    items = pd.DataFrame({
+        "purchase_id": lines["vendor_name"].map(lambda name: purchase_ids[vendor_ids[name]]),
+        "trophy_id": lines["sku"].map(trophy_ids),
+        "quantity": lines["quantity"],
+        "unit_cost": lines["unit_cost"],
+    })
+    for batch in _batches(items.to_dict("records")):
+        db.execute(models.PurchaseItem.__table__.insert(), batch)
+
+    return {"created": len(new_vendors), "restored": restored, "skipped_duplicates": skipped}
+
+def _parse_dates(raw: pd.Series) -> pd.Series:
+    """Vectorized parse in the column's inferred format; cells in other formats are parsed one by one."""
+    dates = pd.to_datetime(raw, errors='coerce')
+    missed = dates.isna() & raw.notna()
+    if missed.any():
+        dates[missed] = pd.to_datetime(raw[missed], errors='coerce', format='mixed')
+    return dates
+
+def import_sales(db: Session, df: pd.DataFrame, owner_id: int) -> Dict[str, int]:
+    """
+    Sales history rows (the monthly "Sale" sheet layout). Rows without a date
+    or grand total are ignored; invoice numbers already on file, or seen
+    earlier in the upload, are skipped. Does not commit.
+    """
+    # Normalize column names for easier access (strip newlines, spaces)
+    df = df.rename(columns=lambda c: str(c).replace('\n', ' ').strip())
+    if 'DATE' not in df.columns or 'GRAND TOTAL' not in df.columns:
+        return {"imported": 0, "skipped": 0}
+    df = df[df['DATE'].notna() & df['GRAND TOTAL'].notna()]
+
+    if 'INVOICE No.' in df.columns:
+        invoices = [_identifier(v) for v in df['INVOICE No.']]
+    else:
+        invoices = [''] * len(df)
+
+    # Earlier whole-file imports stored numeric invoices as "1001.0" when the column had blanks
+    existing = set()
+    wanted = list({v for v in invoices if v})
+    for batch in _batches(wanted):
+        legacy = {f"{v}.0": v for v in batch if v.isdigit()}
+        existing.update(legacy.get(number, number) for (number,) in db.execute(
+            select(models.Sale.invoice_number)
+            .where(models.Sale.owner_id == owner_id, models.Sale.invoice_number.in_(batch + list(legacy)))
+        ))
+
+    has_invoice = pd.Series([bool(v) for v in invoices], index=df.index)
+    invoice_col = pd.Series(invoices, index=df.index, dtype=object)
+    skip = has_invoice & (invoice_col.isin(existing) | invoice_col.duplicated())
+    df, invoice_col = df[~skip], invoice_col[~skip]
+
+    dates = _parse_dates(df['DATE']).fillna(pd.Timestamp(datetime.utcnow()))
+    timestamps = pd.Series(list(dates.dt.to_pydatetime()), index=df.index, dtype=object)
+    sales = pd.DataFrame({
+        "owner_id": owner_id,
+        "timestamp": timestamps,
+        "customer_name": _text(df, "PARTY'S NAME & ADDRESS", default='Unknown'),
+        "invoice_number": invoice_col,
+        "gstin": [('' if v is None else str(v)) for v in _text(df, 'GSTIN No.', default='')],
+        "tax_amount": _numeric(df, 'TOTAL TAX CHARGED', default=0.0),
+        "total_amount": _numeric(df, 'GRAND TOTAL'),
+        "total_profit": 0.0,
+    })
+
+    for batch in _batches(sales.to_dict("records")):
+        db.execute(models.Sale.__table__.insert(), batch)
+
+    # One rollup delta per day rather than one snapshot per sale
+    per_day = sales.groupby(timestamps.map(lambda ts: ts.date()))["total_amount"].agg(["sum", "size"])
+    rollup_service.apply(db, added=[
+        {"owner_id": owner_id, "day": day, **dict.fromkeys(rollup_service.ROLLUP_FIELDS, 0),
+         "revenue": float(revenue), "count": int(count)}
+        for day, (revenue, count) in zip(per_day.index, per_day.itertuples(index=False))
+    ])
+    return {"imported": len(sales), "skipped": int(skip.sum())}
+
+IMPORTERS = {
+    "inventory": import_inventory,
+    "sales": import_sales,
+}
+
+# Vendor groups per purchase unit; groups are independent, so each unit can be committed on its own
+PURCHASE_VENDORS_PER_UNIT = 500
+
+def _sql_value(value):
+    if isinstance(value, (int, float, str, bytes)) or value is None:
+        return value
+    return str(value)
+
+def _spool_purchase_lines(chunks: Iterable[pd.DataFrame], conn: sqlite3.Connection) -> Optional[List[str]]:
+    """
+    Copy the purchase lines into a `lines` table of `conn`, in file order.
+    Returns the columns kept, or None for an empty upload. The table has no
+    declared column types, so values come back as they were parsed.
+    """
+    columns = None
+    for chunk in chunks:
+        if columns is None:
+            check_columns(chunk, PURCHASE_REQUIRED, "Missing required column for purchase")
+            columns = [c for c in PURCHASE_REQUIRED + PURCHASE_OPTIONAL if c in chunk.columns]
+            conn.execute(f"CREATE TABLE lines (seq INTEGER PRIMARY KEY, {', '.join(columns)})")
+        chunk = chunk[chunk['vendor_name'].notna()].reindex(columns=columns)
+        # As import_purchases reads it, before NaN becomes NULL
+        chunk['sku'] = [str(v) for v in chunk['sku']]
+        values = chunk.astype(object).where(chunk.notna(), None).values.tolist()
+        # seq is the file row index, so validation errors still name the right row
+        conn.executemany(
+            f"INSERT INTO lines (seq, {', '.join(columns)}) VALUES (?{', ?' * len(columns)})",
+            ([int(seq)] + [_sql_value(v) for v in row] for seq, row in zip(chunk.index, values))
+        )
+    if columns is not None:
+        conn.execute("CREATE INDEX ix_lines_vendor ON lines (vendor_name, seq)")
+    return columns
+
+def _purchase_units(chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """
+    The upload's lines, PURCHASE_VENDORS_PER_UNIT whole vendor groups at a time
+    (vendors in sorted order, lines in file order). A vendor's lines may be
+    anywhere in the file, so they are spooled to a temporary SQLite file first:
+    memory holds one chunk while reading and one unit while importing.
+    """
+    fd, path = tempfile.mkstemp(prefix="purchase_lines_", suffix=".db")
+    os.close(fd)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        columns = _spool_purchase_lines(chunks, conn)
+        if columns is None:
+            return
+        after = None
+        while True:
+            if after is None:
+                vendors = conn.execute("SELECT DISTINCT vendor_name FROM lines ORDER BY vendor_name LIMIT ?",
+                                       (PURCHASE_VENDORS_PER_UNIT,)).fetchall()
+            else:
+                vendors = conn.execute(
+                    "SELECT DISTINCT vendor_name FROM lines WHERE vendor_name > ? ORDER BY vendor_name LIMIT ?",
+                    (after, PURCHASE_VENDORS_PER_UNIT)).fetchall()
+            if not vendors:
+                return
+            first, after = vendors[0][0], vendors[-1][0]
+            unit = pd.read_sql_query(
+                f"SELECT seq, {', '.join(columns)} FROM lines WHERE vendor_name BETWEEN ? AND ? ORDER BY seq",
+                conn, params=(first, after), index_col="seq"
+            )
+            unit.index.name = None
+            yield unit
+    finally:
+        conn.close()
+        os.remove(path)
+
+def iter_import(db: Session, chunks: Iterable[pd.DataFrame], import_type: str, owner_id: int,
+                payment_status: str = "Due") -> Iterator[Tuple[int, Dict[str, int]]]:
+    """
+    Apply an upload unit by unit (a parsed chunk, or a batch of purchase
+    vendor groups), yielding (rows processed, counts) after each so the
+    caller can commit or report progress in between.
+    """
+    if import_type == "purchase":
+        for unit in _purchase_units(chunks):
+            yield len(unit), import_purchases(db, unit, owner_id, payment_status)
+        return
+
+    importer = IMPORTERS.get(import_type)
+    if importer is None:
+        raise ImportValidationError(f"Unknown import type: {import_type}")
+    for chunk in chunks:
+        yield len(chunk), importer(db, chunk, owner_id)
+
+EMPTY_COUNTS = {
+    "purchase": {"created": 0, "restored": 0, "skipped_duplicates": 0},
+    "inventory": {"imported": 0, "updated": 0},
+    "sales": {"imported": 0, "skipped": 0},
+}
+
+def add_counts(totals: Dict[str, int], counts: Dict[str, int]) -> Dict[str, int]:
+    for key, value in counts.items():
+        totals[key] = totals.get(key, 0) + value
+    return totals
+
+def run_import(db: Session, chunks: Iterable[pd.DataFrame], import_type: str, owner_id: int,
+               payment_status: str = "Due") -> Dict[str, int]:
+    """Apply a whole upload; counts are summed across units. Does not commit."""
+    totals = dict(EMPTY_COUNTS.get(import_type, {}))
+    for _, counts in iter_import(db, chunks, import_type, owner_id, payment_status):
+        add_counts(totals, counts)
+    return totals
@@ -0,0 +1,209 @@
+from datetime import datetime, date, time, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+import models
+from database import day_of
+
+# Daily sales rollup.
+# daily_sales_rollup holds one row per (owner, day) with the totals of that
+# day's sales. The sales router applies every change to it inside the same
+# transaction as the sale itself, so trend and dashboard queries read one row
+# per day instead of every sale. rebuild() recomputes it from scratch.
+# Sales without an owner (legacy rows) count nowhere, neither in the rollup
+# nor in the raw edge-day queries, until init_db assigns them to root and
+# adds them to the rollup.
+
+ROLLUP_FIELDS = ("revenue", "profit", "count", "items_sold", "paid_amount")
+
+def sale_snapshot(sale: models.Sale, items_sold: Optional[int] = None) -> Optional[dict]:
+    """A sale's contribution to the rollup, taken before and after a change."""
+    if sale.owner_id is None:
+        return None
+    timestamp = sale.timestamp or datetime.utcnow()
+    if items_sold is None:
+        items_sold = sum(item.quantity or 0 for item in sale.items)
+    return {
+        "owner_id": sale.owner_id,
+        "day": timestamp.date(),
+        "revenue": sale.total_amount or 0.0,
+        "profit": sale.total_profit or 0.0,
+        "count": 1,
+        "items_sold": items_sold,
+        "paid_amount": sale.paid_amount or 0.0,
+    }
+
+def apply(db: Session, removed: Iterable[Optional[dict]] = (), added: Iterable[Optional[dict]] = ()):
+    """Subtract `removed` snapshots and add `added` ones, one upsert per (owner, day)."""
+    deltas: Dict[Tuple[int, date], dict] = {}
+    for snapshots, sign in ((removed, -1), (added, 1)):
+        for snap in snapshots:
+            if snap is None:
+                continue
+            delta = deltas.setdefault((snap["owner_id"], snap["day"]), dict.fromkeys(ROLLUP_FIELDS, 0))
+            for field in ROLLUP_FIELDS:
+                delta[field] += sign * snap[field]
+
+    for (owner_id, day), delta in deltas.items():
+        if any(delta.values()):
+            _upsert(db, owner_id, day, delta)
+
+def _upsert(db: Session, owner_id: int, day: date, delta: dict):
+    rollup = models.DailySalesRollup
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(rollup).values(owner_id=owner_id, day=day, **delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["owner_id", "day"],
+            set_={field: getattr(rollup, field) + getattr(stmt.excluded, field) for field in ROLLUP_FIELDS}
+        )
+        db.execute(stmt)
+        return
+
+    updated = db.execute(
+        update(rollup)
+        .where(rollup.owner_id == owner_id, rollup.day == day)
+        .values({field: getattr(rollup, field) + value for field, value in delta.items()})
+    ).rowcount
+    if not updated:
+        db.add(rollup(owner_id=owner_id, day=day, **delta))
+        db.flush()
+
+def rebuild(db: Session, owner_id: Optional[int] = None) -> int:
+    """Recompute the rollup from the sales table. Returns the number of day rows written."""
+    rollup = models.DailySalesRollup
+    clear = delete(rollup)
+    if owner_id is not None:
+        clear = clear.where(rollup.owner_id == owner_id)
+    db.execute(clear)
+
+    items_per_sale = select(
+        models.SaleItem.sale_id,
+        func.sum(models.SaleItem.quantity).label("items_sold")
+    ).group_by(models.SaleItem.sale_id).subquery()
+
+    day = day_of(models.Sale.timestamp)
+    totals = select(
+        models.Sale.owner_id,
+        day,
+        func.coalesce(func.sum(models.Sale.total_amount), 0.0),
+        func.coalesce(func.sum(models.Sale.total_profit), 0.0),
+        func.count(models.Sale.id),
+        func.coalesce(func.sum(items_per_sale.c.items_sold), 0),
+        func.coalesce(func.sum(models.Sale.paid_amount), 0.0),
+    ).outerjoin(
+        items_per_sale, items_per_sale.c.sale_id == models.Sale.id
+    ).where(
+        models.Sale.owner_id.isnot(None),
+        models.Sale.timestamp.isnot(None)
+    ).group_by(models.Sale.owner_id, day)
+    if owner_id is not None:
+        totals = totals.where(models.Sale.owner_id == owner_id)
+
+    db.execute(models.DailySalesRollup.__table__.insert().from_select(
+        ["owner_id", "day", *ROLLUP_FIELDS], totals
+    ))
+    db.commit()
+    return db.query(func.count(rollup.id)).scalar()
+
+def ensure_backfilled(db: Session):
+    """Backfill an empty rollup (first start after upgrading) from existing sales."""
+    if db.query(models.DailySalesRollup.id).first() is None and db.query(models.Sale.id).first() is not None:
+        print(f"[Rollup] Backfilled {rebuild(db)} daily rows")
+
+# --- Reading ---
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _split_range(start: datetime, end: datetime):
+    """
+    Whole days inside [start, end] are answered by the rollup; the partial
+    days at either edge are aggregated from raw sales.
+    Returns (first_day, last_day, raw_filter).
+    """
+    start, end = _naive_utc(start), _naive_utc(end)
+    ts = models.Sale.timestamp
+    first_day = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+    last_day = end.date() - timedelta(days=1)
+    if first_day > last_day:
+        return None, None, and_(ts >= start, ts <= end)
+
+    return first_day, last_day, or_(
+        and_(ts >= start, ts < datetime.combine(first_day, time.min)),
+        and_(ts >= datetime.combine(last_day + timedelta(days=1), time.min), ts <= end),
+    )
+
+def _owned_by(query, owner_id: Optional[int]):
+    """Raw sales of one owner, or of every owner (never unowned sales, which the rollup leaves out)."""
+    if owner_id is not None:
+        return query.filter(models.Sale.owner_id == owner_id)
+    return query.filter(models.Sale.owner_id.isnot(None))
+
+def sales_totals(db: Session, owner_id: Optional[int], start: datetime, end: datetime):
+    """(count, revenue, profit) of sales in [start, end]; owner_id None means all owners."""
+    first_day, last_day, edge_filter = _split_range(start, end)
+    count, revenue, profit = 0, 0.0, 0.0
+
+    if first_day is not None:
+        rollup = models.DailySalesRollup
+        query = db.query(func.sum(rollup.count), func.sum(rollup.revenue), func.sum(rollup.profit)).filter(
+            rollup.day >= first_day, rollup.day <= last_day
+        )
+        if owner_id is not None:
+            query = query.filter(rollup.owner_id == owner_id)
+        r_count, r_revenue, r_profit = query.one()
+        count, revenue, profit = r_count or 0, r_revenue or 0.0, r_profit or 0.0
+
+    query = db.query(
+        func.count(models.Sale.id), func.sum(models.Sale.total_amount), func.sum(models.Sale.total_profit)
+    ).filter(edge_filter)
+    query = _owned_by(query, owner_id)
+    e_count, e_revenue, e_profit = query.one()
+
+    return count + (e_count or 0), revenue + (e_revenue or 0.0), profit + (e_profit or 0.0)
+
+def daily_totals(db: Session, owner_id: Optional[int], start: datetime, end: datetime):
+    """[(day, revenue, profit)] for days with sales in [start, end], oldest first."""
+    first_day, last_day, edge_filter = _split_range(start, end)
+    days: Dict[date, list] = {}
+
+    if first_day is not None:
+        rollup = models.DailySalesRollup
+        query = db.query(rollup.day, func.sum(rollup.revenue), func.sum(rollup.profit)).filter(
+            rollup.day >= first_day, rollup.day <= last_day, rollup.count > 0
+        )
+        if owner_id is not None:
+            query = query.filter(rollup.owner_id == owner_id)
+        for day, revenue, profit in query.group_by(rollup.day):
+            days[day] = [revenue or 0.0, profit or 0.0]
+
+    day = day_of(models.Sale.timestamp)
+    query = db.query(day, func.sum(models.Sale.total_amount), func.sum(models.Sale.total_profit)).filter(
+        edge_filter
+    )
+    query = _owned_by(query, owner_id)
+    for sale_day, revenue, profit in query.group_by(day):
+        totals = days.setdefault(sale_day, [0.0, 0.0])
+        totals[0] += revenue or 0.0
+        totals[1] += profit or 0.0
+
+    return [(d, revenue, profit) for d, (revenue, profit) in sorted(days.items())]
+
+if __name__ == "__main__":
+    # Usage: python -m services.rollup_service [owner_id]
+    import sys
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        models.Base.metadata.create_all(bind=db.get_bind())
+        owner = int(sys.argv[1]) if len(sys.argv) > 1 else None
+        print(f"Rebuilt daily_sales_rollup: {rebuild(db, owner)} rows")
+    finally:
+        db.close()
@@ -0,0 +1,92 @@
+"""
+Stress test: many tills selling the same SKU at once must never oversell.
+
+Fires N concurrent single-unit sales from a thread pool against one trophy
+with a limited stock, then checks that exactly `stock` sales succeeded and the
+final quantity is zero. Part of the starting quantity comes from a purchase
+that is deleted with revert_stock=true while the sales are running, which
+must neither fail nor lose a concurrent sale's update. Runs against a
+throwaway SQLite file.
+Usage: python stress_concurrent_sales.py [sales] [stock] [threads]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models, schemas
+from routers import purchases, sales
+
+def run(total_sales=2000, stock=500, threads=16, purchased=100):
+    db_path = os.path.join(tempfile.mkdtemp(), "stress.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False, "timeout": 30})
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+    db = Session()
+    user = models.User(username="stress", hashed_password="x", role="user")
+    db.add(user)
+    db.flush()
+    trophy = models.Trophy(owner_id=user.id, name="Hot SKU", sku="STRESS-1", quantity=stock + purchased,
+                           cost_price=10.0, selling_price=25.0)
+    db.add(trophy)
+    db.flush()
+    purchase = models.Purchase(owner_id=user.id, total_amount=purchased * 10.0,
+                               items=[models.PurchaseItem(trophy_id=trophy.id, quantity=purchased, unit_cost=10.0)])
+    db.add(purchase)
+    db.commit()
+    db.refresh(user)
+    trophy_id, purchase_id = trophy.id, purchase.id
+    db.expunge(user)
+    db.close()
+
+    sale_data = schemas.SaleCreate(items=[schemas.SaleItemCreate(trophy_id=trophy_id, quantity=1)])
+
+    # Early enough that the purchased units are still in stock when they are taken back
+    revert_at = min(total_sales // 10, stock // 2)
+
+    def sell(i):
+        session = Session()
+        try:
+            if i == revert_at:
+                purchases.delete_purchase(purchase_id, revert_stock=True, db=session, current_user=user)
+                return "reverted"
+            sales.create_sale(sale_data, db=session, current_user=user)
+            return 200
+        except HTTPException as e:
+            return e.status_code
+        finally:
+            session.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(sell, range(total_sales + 1)))
+    elapsed = time.perf_counter() - start
+
+    db = Session()
+    final_quantity = db.query(models.Trophy.quantity).filter(models.Trophy.id == trophy_id).scalar()
+    recorded_units = sum(q for (q,) in db.query(models.SaleItem.quantity))
+    db.close()
+
+    succeeded = results.count(200)
+    print(f"{total_sales} sales on {threads} threads in {elapsed:.2f}s ({total_sales / elapsed:.0f} req/s)")
+    print(f"succeeded={succeeded} out_of_stock={results.count(400)} conflicts={results.count(409)}")
+    print(f"final quantity={final_quantity} units recorded on sale items={recorded_units}")
+    print(f"purchase revert: {results[revert_at]}")
+
+    assert results[revert_at] == "reverted", "deleting the purchase with revert_stock failed"
+
+    assert final_quantity >= 0, "stock went negative"
+    assert final_quantity == stock - succeeded, "stock does not match successful sales"
+    assert recorded_units == succeeded, "sale items do not match successful sales"
+    assert succeeded == stock, "sales were rejected while stock was still available"
+    print("OK")
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
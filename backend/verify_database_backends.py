@@ -0,0 +1,138 @@
+"""
+Run the same end-to-end router flow against every configured database backend.
+
+SQLite always runs (throwaway file). PostgreSQL runs against --postgres-url,
+or against a throwaway cluster started here with --start-postgres (needs
+initdb/pg_ctl on PATH). Exits non-zero if any backend fails.
+Usage: python verify_database_backends.py [--postgres-url URL] [--start-postgres]
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import create_db_engine, get_db
+from routers import inventory, sales, customers, analytics, purchases, vendors
+from routers.auth import get_current_user
+
+def run_flow(url):
+    engine = create_db_engine(url)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+    db = Session()
+    user = models.User(username="backend-check", hashed_password="x", role="user")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+
+    def override_get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    for module in (inventory, sales, customers, analytics, purchases, vendors):
+        app.include_router(module.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    client = TestClient(app)
+
+    def ok(response):
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    trophy = ok(client.post("/inventory/", json={"name": "Gold Cup", "sku": "BK-1", "quantity": 10,
+                                                 "cost_price": 40.0, "selling_price": 100.0}))
+    customer = ok(client.post("/customers/", json={"name": "Backend Customer"}))
+    sale = ok(client.post("/sales/", json={"customer_id": customer["id"], "payment_status": "Due",
+                                           "items": [{"trophy_id": trophy["id"], "quantity": 3}]}))
+    assert sale["total_amount"] == 300.0
+    ok(client.put(f"/sales/{sale['id']}", json={"items": [{"trophy_id": trophy["id"], "quantity": 4}]}))
+    assert ok(client.get(f"/inventory/{trophy['id']}"))["quantity"] == 6
+    ok(client.post(f"/sales/{sale['id']}/pay", params={"amount": 100.0}))
+    assert ok(client.get(f"/customers/{customer['id']}"))["current_balance"] == -300.0
+
+    page = ok(client.get("/sales/", params={"cursor": "", "limit": 1}))
+    assert [s["id"] for s in page["items"]] == [sale["id"]] and page["next_cursor"] is None
+    since = (datetime.utcnow() - timedelta(days=1)).date().isoformat()
+    assert len(ok(client.get("/sales/", params={"start_date": since}))) == 1
+
+    dashboard = ok(client.get("/analytics/dashboard"))
+    assert dashboard["total_sales_count"] == 1 and dashboard["total_revenue"] == 400.0
+    trend = ok(client.get("/analytics/sales_trend"))
+    assert len(trend) == 1 and trend[0]["amount"] == 400.0
+    assert ok(client.get("/inventory/top-sellers/"))[0]["total_sold"] == 4
+
+    ok(client.delete(f"/sales/{sale['id']}"))
+    assert ok(client.get(f"/inventory/{trophy['id']}"))["quantity"] == 10
+
+    models.Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_postgres():
+    if not shutil.which("initdb") or not shutil.which("pg_ctl"):
+        return None, None
+    data_dir = tempfile.mkdtemp(prefix="pgdata-")
+    port = free_port()
+    subprocess.run(["initdb", "-D", data_dir, "-U", "postgres", "--auth=trust"], check=True, capture_output=True)
+    subprocess.run(["pg_ctl", "-D", data_dir, "-o", f"-p {port} -k {data_dir}", "-w", "start"],
+                   check=True, capture_output=True)
+    return f"postgresql+psycopg2://postgres@127.0.0.1:{port}/postgres", data_dir
+
+def stop_postgres(data_dir):
+    subprocess.run(["pg_ctl", "-D", data_dir, "-m", "fast", "-w", "stop"], capture_output=True)
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--postgres-url", default=os.getenv("TEST_POSTGRES_URL"))
+    parser.add_argument("--start-postgres", action="store_true")
+    args = parser.parse_args()
+
+    backends = {"sqlite": f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'backend_check.db')}"}
+    pg_data_dir = None
+    if args.postgres_url:
+        backends["postgresql"] = args.postgres_url
+    elif args.start_postgres:
+        url, pg_data_dir = start_postgres()
+        if url:
+            backends["postgresql"] = url
+        else:
+            print("initdb/pg_ctl not found, skipping PostgreSQL")
+
+    failed = False
+    try:
+        for name, url in backends.items():
+            try:
+                run_flow(url)
+                print(f"[{name}] SUCCESS")
+            except Exception as e:
+                failed = True
+                print(f"[{name}] FAILURE: {e!r}")
+    finally:
+        if pg_data_dir:
+            stop_postgres(pg_data_dir)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Verify streaming answers from POST /insights/chat/stream.
+
+Runs a fake OpenAI-style provider (one word every TOKEN_DELAY seconds as
+Server-Sent Events, or the whole answer at the end without "stream") and
+the insights router under uvicorn on 127.0.0.1, then checks that:
+
+- the streamed answer matches /insights/chat, with the first token arriving
+  long before the blocking endpoint returns;
+- a client that disconnects mid-answer, or while the provider has not sent
+  anything yet, makes the server close the upstream request at once;
+- a provider that fails before answering falls back like /insights/chat.
+
+Exits non-zero on failure.
+Usage: python verify_insights_stream.py
+"""
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+os.environ["GROK_API_KEY"] = "xai-verify"
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+import models
+from routers import insights
+from routers.auth import get_current_user
+from services.ai_service import ai_service
+
+ANSWER = ("Gold cups sold twice as fast as plaques this month, so move the spring "
+          "reorder forward and keep at least forty in stock before the school season.").split(" ")
+TOKEN_DELAY = 0.1
+STALL = 5.0
+
+# Fake provider: what it sent, and whether the proxy hung up on it
+provider = {"tokens_sent": 0, "disconnected_after": None}
+
+async def fake_provider(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while (await receive())["type"] != "lifespan.shutdown":
+            await send({"type": "lifespan.startup.complete"})
+        await send({"type": "lifespan.shutdown.complete"})
+        return
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    request = json.loads(body)
+    question = request["messages"][-1]["content"]
+    if question == "fail":
+        await send({"type": "http.response.start", "status": 503, "headers": []})
+        await send({"type": "http.response.body", "body": b"overloaded"})
+        return
+
+    if not request["stream"]:
+        await asyncio.sleep(TOKEN_DELAY * len(ANSWER))
+        payload = {"choices": [{"message": {"role": "assistant", "content": " ".join(ANSWER)}}]}
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": json.dumps(payload).encode()})
+        return
+
+    provider.update(tokens_sent=0, disconnected_after=None)
+    started = time.perf_counter()
+
+    async def generate():
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+        if question == "stall":
+            await asyncio.sleep(STALL)
+        for i, word in enumerate(ANSWER):
+            await asyncio.sleep(TOKEN_DELAY)
+            chunk = {"choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}}]}
+            await send({"type": "http.response.body", "body": f"data: {json.dumps(chunk)}\n\n".encode(), "more_body": True})
+            provider["tokens_sent"] += 1
+        await send({"type": "http.response.body", "body": b"data: [DONE]\n\n"})
+
+    async def disconnected():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    generating, gone = asyncio.ensure_future(generate()), asyncio.ensure_future(disconnected())
+    await asyncio.wait({generating, gone}, return_when=asyncio.FIRST_COMPLETED)
+    if gone.done() and not generating.done():
+        provider["disconnected_after"] = time.perf_counter() - started
+    generating.cancel()
+    gone.cancel()
+
+def serve(app) -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+def read_events(lines) -> list:
+    events, event = [], "message"
+    for line in lines:
+        if line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            events.append((event, json.loads(line[len("data:"):])))
+            event = "message"
+    return events
+
+async def hang_up(client: httpx.AsyncClient, query: str, after_tokens: int, after_seconds: float) -> float:
+    """Open a stream, leave after `after_tokens` tokens (or `after_seconds`); seconds until the provider noticed."""
+    async with client.stream("POST", "/insights/chat/stream", params={"query": query}) as response:
+        async def read():
+            seen = 0
+            async for line in response.aiter_lines():
+                seen += line.startswith("data:")
+                if seen >= after_tokens:
+                    return
+        try:
+            await asyncio.wait_for(read(), after_seconds)
+        except asyncio.TimeoutError:
+            pass
+        left = time.perf_counter()
+    while provider["disconnected_after"] is None and time.perf_counter() - left < 2:
+        await asyncio.sleep(0.01)
+    return time.perf_counter() - left if provider["disconnected_after"] is not None else float("inf")
+
+async def run_checks(base_url: str) -> bool:
+    ok = True
+    expected = " ".join(ANSWER)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        start = time.perf_counter()
+        blocking = (await client.post("/insights/chat", params={"query": "how are sales?"})).json()["response"]
+        blocking_seconds = time.perf_counter() - start
+
+        start, first_token = time.perf_counter(), None
+        async with client.stream("POST", "/insights/chat/stream", params={"query": "how are sales?"}) as response:
+            media_type = response.headers["content-type"]
+            lines = []
+            async for line in response.aiter_lines():
+                if first_token is None and line.startswith("data:"):
+                    first_token = time.perf_counter() - start
+                lines.append(line)
+        streamed_seconds = time.perf_counter() - start
+        events = read_events(lines)
+        streamed = "".join(data["token"] for event, data in events if event == "message")
+
+        print(f"Blocking /chat:      {blocking_seconds:.2f} s")
+        print(f"Streaming /chat:     first token {first_token * 1000:.0f} ms, complete {streamed_seconds:.2f} s, "
+              f"{len(events) - 1} token events, {media_type}")
+        if not (streamed == expected == blocking and events[-1][0] == "done" and media_type.startswith("text/event-stream")):
+            print("FAILURE: streamed answer differs from /insights/chat or does not end with event: done")
+            ok = False
+        if first_token > 0.5 or first_token > blocking_seconds / 4:
+            print("FAILURE: first token was not sent well before the full answer")
+            ok = False
+
+        noticed = await hang_up(client, "how are sales?", after_tokens=3, after_seconds=10)
+        print(f"Hang up mid-answer:  provider closed {noticed * 1000:.0f} ms later, "
+              f"after {provider['tokens_sent']}/{len(ANSWER)} tokens")
+        if noticed > 0.5 or provider["tokens_sent"] >= len(ANSWER):
+            print("FAILURE: upstream generation was not cancelled when the client disconnected")
+            ok = False
+
+        noticed = await hang_up(client, "stall", after_tokens=1, after_seconds=0.3)
+        print(f"Hang up before any token: provider closed {noticed * 1000:.0f} ms later")
+        if noticed > 0.5:
+            print("FAILURE: a provider that had not answered yet kept running after the client left")
+            ok = False
+
+        async with client.stream("POST", "/insights/chat/stream", params={"query": "fail"}) as response:
+            events = read_events([line async for line in response.aiter_lines()])
+        print(f"Provider error:      {[event for event, _ in events]}")
+        if [event for event, _ in events] != ["message", "done"] or not events[0][1]["token"]:
+            print("FAILURE: a provider error before the first token did not fall back")
+            ok = False
+    return ok
+
+def verify():
+    ai_service.base_url = serve(fake_provider) + "/v1/chat/completions"
+    user = models.User(id=1, username="stream", hashed_password="x", role="user", is_active=True)
+    app = FastAPI()
+    app.include_router(insights.router)
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    if not asyncio.run(run_checks(serve(app))):
+        sys.exit(1)
+    print("SUCCESS: /insights/chat/stream streams tokens and stops upstream when the client leaves")
+
+if __name__ == "__main__":
+    verify()
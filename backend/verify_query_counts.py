@@ -0,0 +1,74 @@
+"""
+Verify that GET /sales/ costs a constant number of SQL statements no matter
+how many sales (and items per sale) the page holds.
+
+Runs against a throwaway SQLite file. Exits non-zero on regression.
+"""
+import os
+import sys
+import tempfile
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import get_db, query_count_middleware
+from routers import sales
+from routers.auth import get_current_user
+
+def verify():
+    db_path = os.path.join(tempfile.mkdtemp(), "query_counts.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+    db = Session()
+    user = models.User(username="counter", hashed_password="x", role="user")
+    db.add(user)
+    db.flush()
+    trophies = [models.Trophy(owner_id=user.id, name=f"Item {i}", sku=f"QC-{i}", quantity=100)
+                for i in range(20)]
+    db.add_all(trophies)
+    db.flush()
+    for n in range(150):
+        db.add(models.Sale(owner_id=user.id, customer_name=f"Customer {n}", total_amount=10.0, items=[
+            models.SaleItem(trophy_id=trophies[(n + k) % len(trophies)].id, quantity=1,
+                            unit_price_at_sale=10.0, unit_cost_at_sale=5.0)
+            for k in range(1 + n % 5)
+        ]))
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    db.close()
+
+    def override_get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.middleware("http")(query_count_middleware)
+    app.include_router(sales.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    client = TestClient(app)
+
+    counts = {}
+    for limit in (1, 10, 100):
+        response = client.get("/sales/", params={"limit": limit})
+        assert response.status_code == 200, response.text
+        assert len(response.json()) == limit
+        counts[limit] = int(response.headers["X-Query-Count"])
+        print(f"limit={limit:>4}: {counts[limit]} queries")
+
+    if len(set(counts.values())) != 1:
+        print("FAILURE: query count grows with page size")
+        sys.exit(1)
+    print("SUCCESS: query count is constant")
+
+if __name__ == "__main__":
+    verify()
@@ -0,0 +1,125 @@
+"""
+EXPLAIN QUERY PLAN regression check.
+
+Drives the routers' read and write endpoints as a regular (non-root) user
+against a throwaway SQLite database, captures every SELECT/UPDATE/DELETE they
+issue and fails if SQLite plans a full table scan for any of them.
+Exits non-zero on regression.
+"""
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import get_db
+from routers import inventory, sales, purchases, customers, vendors, analytics
+from routers.auth import get_current_user
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+def verify():
+    db_path = os.path.join(tempfile.mkdtemp(), "plans.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+    db = Session()
+    user = models.User(username="planner", hashed_password="x", role="user")
+    db.add(user)
+    db.flush()
+    customer = models.Customer(owner_id=user.id, name="Plan Customer")
+    vendor = models.Vendor(owner_id=user.id, name="Plan Vendor")
+    trophy = models.Trophy(owner_id=user.id, name="Plan Item", sku="PLAN-1", quantity=1000,
+                           cost_price=5.0, selling_price=9.0)
+    db.add_all([customer, vendor, trophy])
+    db.flush()
+    db.add(models.Purchase(owner_id=user.id, vendor_id=vendor.id, total_amount=50.0, items=[
+        models.PurchaseItem(trophy_id=trophy.id, quantity=10, unit_cost=5.0)
+    ]))
+    db.commit()
+    db.refresh(user)
+    ids = {"customer": customer.id, "vendor": vendor.id, "trophy": trophy.id}
+    db.expunge(user)
+    db.close()
+
+    captured = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")) and not executemany:
+            captured.append((statement, parameters))
+
+    def override_get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    for module in (inventory, sales, purchases, customers, vendors, analytics):
+        app.include_router(module.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    client = TestClient(app)
+
+    since = (datetime.utcnow() - timedelta(days=7)).date().isoformat()
+    sale = client.post("/sales/", json={
+        "customer_id": ids["customer"], "payment_status": "Due",
+        "items": [{"trophy_id": ids["trophy"], "quantity": 2}]
+    }).json()
+    calls = [
+        ("get", "/sales/", {"start_date": since}),
+        ("get", "/sales/", {"cursor": ""}),
+        ("get", "/sales/", {"customer_id": ids["customer"]}),
+        ("get", "/sales/customers", {}),
+        ("post", f"/sales/{sale['id']}/pay", {}),
+        ("post", f"/sales/{sale['id']}/unpay", {}),
+        ("put", f"/sales/{sale['id']}", {"json": {"items": [{"trophy_id": ids["trophy"], "quantity": 1}]}}),
+        ("get", "/purchases/", {}),
+        ("get", "/purchases/", {"vendor_id": ids["vendor"]}),
+        ("get", "/inventory/", {"cursor": ""}),
+        ("get", "/inventory/top-sellers/", {}),
+        ("get", f"/inventory/{ids['trophy']}", {}),
+        ("get", "/customers/", {}),
+        ("get", f"/customers/{ids['customer']}/recommendations", {}),
+        ("get", "/vendors/", {}),
+        ("get", f"/vendors/{ids['vendor']}/purchases", {}),
+        ("get", "/analytics/dashboard", {}),
+        ("get", "/analytics/sales_trend", {}),
+        ("delete", f"/sales/{sale['id']}", {}),
+    ]
+    for method, path, params in calls:
+        body = params.pop("json", None)
+        response = getattr(client, method)(path, params=params, **({"json": body} if body else {}))
+        assert response.status_code == 200, f"{method.upper()} {path}: {response.text}"
+
+    failures = []
+    seen = set()
+    with engine.connect() as conn:
+        for statement, parameters in captured:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            scans = [row[-1] for row in plan if FULL_SCAN.match(row[-1])]
+            if scans:
+                failures.append((statement, scans))
+
+    print(f"Checked {len(seen)} distinct statements")
+    for statement, scans in failures:
+        print(f"\nFULL SCAN {', '.join(scans)}:\n  {' '.join(statement.split())}")
+    if failures:
+        print(f"\nFAILURE: {len(failures)} statement(s) fall back to a full table scan")
+        sys.exit(1)
+    print("SUCCESS: every statement is served by an index")
+
+if __name__ == "__main__":
+    verify()
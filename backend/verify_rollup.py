@@ -0,0 +1,132 @@
+"""
+Verify the daily sales rollup stays consistent with the sales table.
+
+Drives random creates, updates, payments and deletes through the sales
+router on a throwaway SQLite file, then checks that the incrementally
+maintained rollup equals a full rebuild and that the dashboard and trend
+endpoints match totals computed directly from raw sales.
+"""
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import create_db_engine, get_db
+from routers import sales, analytics
+from routers.auth import get_current_user
+from services import rollup_service
+
+def rollup_rows(db):
+    return {
+        (r.owner_id, r.day): (round(r.revenue, 6), round(r.profit, 6), r.count, r.items_sold, round(r.paid_amount, 6))
+        for r in db.query(models.DailySalesRollup) if r.count
+    }
+
+def verify(operations=300):
+    db_path = os.path.join(tempfile.mkdtemp(), "rollup.db")
+    engine = create_db_engine(f"sqlite:///{db_path}")
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+    db = Session()
+    user = models.User(username="rollup", hashed_password="x", role="user")
+    db.add(user)
+    db.flush()
+    trophies = [models.Trophy(owner_id=user.id, name=f"Item {i}", sku=f"RU-{i}", quantity=100_000,
+                              cost_price=10.0 + i, selling_price=25.0 + i) for i in range(5)]
+    db.add_all(trophies)
+    db.commit()
+    db.refresh(user)
+    trophy_ids = [t.id for t in trophies]
+    db.expunge(user)
+    db.close()
+
+    def override_get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(sales.router)
+    app.include_router(analytics.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    client = TestClient(app)
+
+    rng = random.Random(7)
+    sale_ids = []
+    for _ in range(operations):
+        action = rng.choice(["create", "create", "update", "pay", "unpay", "delete"]) if sale_ids else "create"
+        items = [{"trophy_id": rng.choice(trophy_ids), "quantity": rng.randint(1, 4)} for _ in range(rng.randint(1, 3))]
+        if action == "create":
+            response = client.post("/sales/", json={"payment_status": rng.choice(["Paid", "Due"]), "items": items})
+            sale_ids.append(response.json()["id"])
+        elif action == "update":
+            response = client.put(f"/sales/{rng.choice(sale_ids)}", json={"items": items})
+        elif action == "pay":
+            response = client.post(f"/sales/{rng.choice(sale_ids)}/pay", params={"amount": 1.0})
+            if response.status_code == 400:
+                continue
+        elif action == "unpay":
+            response = client.post(f"/sales/{rng.choice(sale_ids)}/unpay")
+        else:
+            sale_id = rng.choice(sale_ids)
+            sale_ids.remove(sale_id)
+            response = client.delete(f"/sales/{sale_id}")
+        assert response.status_code == 200, f"{action}: {response.text}"
+
+    # Spread sales over past days so the trend and whole-day paths are exercised
+    db = Session()
+    for sale in db.query(models.Sale):
+        sale.timestamp = datetime.utcnow() - timedelta(days=rng.randint(0, 20), hours=rng.randint(0, 23))
+    db.commit()
+    rollup_service.rebuild(db)
+    db.close()
+
+    # Incremental maintenance on top of the shifted data must still match a rebuild
+    for _ in range(50):
+        items = [{"trophy_id": rng.choice(trophy_ids), "quantity": rng.randint(1, 4)}]
+        sale_id = client.post("/sales/", json={"payment_status": "Due", "items": items}).json()["id"]
+        client.put(f"/sales/{sale_id}", json={"items": items + items})
+        client.post(f"/sales/{sale_id}/pay", params={"amount": 2.0})
+        if rng.random() < 0.3:
+            client.delete(f"/sales/{rng.choice(sale_ids)}")
+
+    failures = []
+    db = Session()
+    incremental = rollup_rows(db)
+    rollup_service.rebuild(db)
+    rebuilt = rollup_rows(db)
+    if incremental != rebuilt:
+        failures.append(f"incremental rollup differs from rebuild: {set(incremental.items()) ^ set(rebuilt.items())}")
+
+    start = datetime.utcnow() - timedelta(days=14, hours=5)
+    end = datetime.utcnow()
+    raw = db.query(func.count(models.Sale.id), func.sum(models.Sale.total_amount)).filter(
+        models.Sale.timestamp >= start, models.Sale.timestamp <= end).one()
+    db.close()
+
+    dashboard = client.get("/analytics/dashboard", params={"start_date": start.isoformat(), "end_date": end.isoformat()}).json()
+    if dashboard["total_sales_count"] != raw[0] or abs(dashboard["total_revenue"] - (raw[1] or 0.0)) > 1e-6:
+        failures.append(f"dashboard {dashboard} != raw {raw}")
+    trend = client.get("/analytics/sales_trend", params={"start_date": start.isoformat(), "end_date": end.isoformat()}).json()
+    if abs(sum(day["amount"] for day in trend) - (raw[1] or 0.0)) > 1e-6:
+        failures.append("trend total differs from raw sales")
+
+    for failure in failures:
+        print(f"FAILURE: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"SUCCESS: rollup consistent across {operations + 150} operations ({len(rebuilt)} day rows)")
+
+if __name__ == "__main__":
+    verify()
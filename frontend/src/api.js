@@ -69,11 +69,46 @@ export const getDashboardStats = (params) => api.get('/analytics/dashboard', { p
 export const getSalesTrend = (params) => api.get('/analytics/sales_trend', { params });
 export const getBusinessSummary = () => api.get('/insights/business-summary');
 export const chatWithAssistant = (query) => api.post(`/insights/chat?query=${encodeURIComponent(query)}`);
+// Streams the answer: onToken(text) for each piece as it is generated. Abort `signal` to stop.
+export const streamAssistant = async (query, onToken, signal) => {
+    const response = await fetch(`${API_URL}/insights/chat/stream?query=${encodeURIComponent(query)}`, {
+        method: 'POST',
+        headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
+        signal,
+    });
+    if (!response.ok) throw new Error(`Assistant request failed: ${response.status}`);
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) return;
+        buffer += value;
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const block of events) {
+            const event = block.match(/^event: (.*)$/m)?.[1];
+            const data = JSON.parse(block.match(/^data: (.*)$/m)[1]);
+            if (event === 'error') throw new Error(data.detail);
+            if (event === 'done') return;
+            onToken(data.token);
+        }
+    }
+};
 
 // Import/Export
 export const importData = (formData) => api.post('/import_export/import', formData, {
     headers: { 'Content-Type': 'multipart/form-data' },
 });
+// Large files: returns { job_id } at once, then poll getImportJob(job_id)
+export const startImportJob = (formData, params) => api.post('/import_export/import', formData, {
+    params: { ...params, background: true },
+    headers: { 'Content-Type': 'multipart/form-data' },
+});
+export const getImportJob = (jobId) => api.get(`/import_export/jobs/${jobId}`);
 export const exportInventory = () => api.get('/import_export/export', { responseType: 'blob' });
+export const exportData = (dataset, format = 'xlsx') => api.get(`/import_export/export/${dataset}`, {
+    params: { format },
+    responseType: 'blob',
+});
 
 export default api;
@@ -1,42 +1,158 @@
 import pandas as pd
-import sqlite3
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from backup_service import load_manifest, replay_sales
+from services import rollup_service
 
 # Paths
 DB_PATH = 'backend/inventory.db'
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DB_PATH}")
 MASTER_DIR = 'C:/RetailInventoryData/exports/master'
+SALES_ROOT = 'C:/RetailInventoryData/exports/sales'
 ROOT_USER_ID = 1
 
+# Backups are xlsx or, with BACKUP_FORMAT=parquet, parquet
+BACKUP_EXTENSIONS = ('.parquet', '.xlsx')
+
+def read_backup(path):
+    return pd.read_parquet(path) if path.endswith('.parquet') else pd.read_excel(path)
+
+def find_master_file(name):
+    """Path of the master backup `name` (parquet preferred over xlsx), or None."""
+    for ext in BACKUP_EXTENSIONS:
+        path = os.path.join(MASTER_DIR, name + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+def clear_owner_rows(conn, table):
+    conn.execute(text(f"DELETE FROM {table} WHERE owner_id = :owner_id"), {"owner_id": ROOT_USER_ID})
+
+def reset_id_sequence(conn, table):
+    # Rows restored with explicit ids leave PostgreSQL's serial counter behind
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+        ))
+
+def append_rows(engine, df, table, clear_first=False):
+    # One transaction per attempt: a failed insert must not poison the retry
+    with engine.begin() as conn:
+        if clear_first:
+            clear_owner_rows(conn, table)
+        df.to_sql(table, conn, if_exists='append', index=False)
+        reset_id_sequence(conn, table)
+
+def find_latest_sales_file():
+    """Newest full sales export written before incremental backups existed."""
+    all_sales_files = []
+    for root, dirs, files in os.walk(SALES_ROOT):
+        for file in files:
+            if file.startswith('sales_') and not file.startswith('sales_delta_') and file.endswith(BACKUP_EXTENSIONS):
+                all_sales_files.append(os.path.join(root, file))
+    return max(all_sales_files, key=os.path.getmtime) if all_sales_files else None
+
+def rebuild_rollup(engine, owner_id=None):
+    """Recompute the daily sales rollup (dashboard and trend totals) from the restored sales."""
+    with Session(engine) as db:
+        rows = rollup_service.rebuild(db, owner_id)
+    print(f"  Rebuilt {rows} daily sales rollup rows.")
+
+def restore_sales(engine):
+    """Replace the root user's sales from the backup. Returns True if the sales table was changed."""
+    if not os.path.exists(SALES_ROOT):
+        return False
+
+    df_items = None
+    if load_manifest(SALES_ROOT) is not None:
+        print("\nReplaying sales base + deltas...")
+        df_sales, df_items = replay_sales(SALES_ROOT)
+    else:
+        print("\nSearching for latest sales export...")
+        latest_sales = find_latest_sales_file()
+        if latest_sales is None:
+            print("No sales export files found.")
+            return False
+        print(f"Restoring sales records from {latest_sales}...")
+        df_sales = read_backup(latest_sales)
+
+    df_sales['owner_id'] = ROOT_USER_ID
+
+    # Initialize flags
+    if 'payment_status' not in df_sales.columns: df_sales['payment_status'] = 'Paid'
+    if 'paid_amount' not in df_sales.columns: df_sales['paid_amount'] = df_sales['total_amount']
+    if 'total_profit' not in df_sales.columns: df_sales['total_profit'] = 0.0
+
+    df_sales = df_sales.where(pd.notnull(df_sales), None)
+
+    if df_items is not None:
+        # Items of the sales about to be replaced go first (they reference them)
+        with engine.begin() as conn:
+            conn.execute(text(
+                "DELETE FROM sale_items WHERE sale_id IN (SELECT id FROM sales WHERE owner_id = :owner_id)"
+            ), {"owner_id": ROOT_USER_ID})
+
+    try:
+        # Clear existing restored sales to avoid duplicates
+        append_rows(engine, df_sales, 'sales', clear_first=True)
+        print(f"  Successfully restored {len(df_sales)} sales records.")
+    except Exception as e:
+        print(f"  Error restoring sales: {e}")
+        print(f"  Retrying without ID...")
+        try:
+            append_rows(engine, df_sales.drop(columns=['id'], errors='ignore'), 'sales', clear_first=True)
+            print(f"  Successfully restored {len(df_sales)} sales records (IDs re-assigned).")
+        except Exception as e2:
+            print(f"  Critical error for sales: {e2}")
+            return False
+        if df_items is not None:
+            print("  Skipping sale items: sale IDs were not preserved.")
+        return True
+
+    if df_items is not None:
+        df_items = df_items.where(pd.notnull(df_items), None)
+        try:
+            append_rows(engine, df_items, 'sale_items')
+            print(f"  Successfully restored {len(df_items)} sale items.")
+        except Exception as e:
+            print(f"  Error restoring sale items: {e}")
+    return True
+
 def restore():
-    if not os.path.exists(DB_PATH):
+    if DATABASE_URL.startswith("sqlite") and not os.path.exists(DB_PATH):
         print(f"Error: Database not found at {DB_PATH}")
         return
 
-    conn = sqlite3.connect(DB_PATH)
+    engine = create_engine(DATABASE_URL)
     
-    # Mapping Excel to Tables
+    # Mapping backup files to Tables
     files_to_tables = {
-        'inventory.xlsx': 'trophies',
-        'customers.xlsx': 'customers',
-        'vendors.xlsx': 'vendors',
-        'purchases.xlsx': 'purchases'
+        'inventory': 'trophies',
+        'customers': 'customers',
+        'vendors': 'vendors',
+        'purchases': 'purchases'
     }
 
-    for filename, table in files_to_tables.items():
-        file_path = os.path.join(MASTER_DIR, filename)
-        if not os.path.exists(file_path):
-            print(f"Skipping: {filename} (File not found)")
+    for name, table in files_to_tables.items():
+        file_path = find_master_file(name)
+        if file_path is None:
+            print(f"Skipping: {name} (File not found)")
             continue
 
+        filename = os.path.basename(file_path)
         print(f"Restoring {table} from {filename}...")
-        df = pd.read_excel(file_path)
+        df = read_backup(file_path)
         
         # Add owner_id
         df['owner_id'] = ROOT_USER_ID
         
         # Initialize mandatory flags if missing from Excel
         if table == 'purchases':
-            df['is_active'] = 1
+            df['is_active'] = True
             if 'payment_status' not in df.columns: df['payment_status'] = 'Due'
             if 'paid_amount' not in df.columns: df['paid_amount'] = 0.0
         elif table == 'vendors':
@@ -52,58 +168,22 @@ def restore():
         try:
             # Drop the local 'id' if we want auto-increment and clean start
             # Actually, let's keep it to maintain links if Excel has them
-            df.to_sql(table, conn, if_exists='append', index=False)
+            append_rows(engine, df, table)
             print(f"  Successfully restored {len(df)} records to {table}")
         except Exception as e:
             print(f"  Error restoring {table}: {e}")
             print(f"  Retrying after clearing table and dropping ID for {table}...")
             try:
-                conn.execute(f"DELETE FROM {table} WHERE owner_id = {ROOT_USER_ID}")
-                df.drop(columns=['id'], errors='ignore').to_sql(table, conn, if_exists='append', index=False)
+                append_rows(engine, df.drop(columns=['id'], errors='ignore'), table, clear_first=True)
                 print(f"  Successfully restored {len(df)} records to {table} (IDs re-assigned)")
             except Exception as e2:
                 print(f"  Critical error for {table}: {e2}")
 
-    # Special handling for Sales (most recent)
-    SALES_ROOT = 'C:/RetailInventoryData/exports/sales'
-    if os.path.exists(SALES_ROOT):
-        print("\nSearching for latest sales export...")
-        all_sales_files = []
-        for root, dirs, files in os.walk(SALES_ROOT):
-            for file in files:
-                if file.startswith('sales_') and file.endswith('.xlsx'):
-                    all_sales_files.append(os.path.join(root, file))
-        
-        if all_sales_files:
-            latest_sales = max(all_sales_files, key=os.path.getmtime)
-            print(f"Restoring sales records from {latest_sales}...")
-            df_sales = pd.read_excel(latest_sales)
-            df_sales['owner_id'] = ROOT_USER_ID
-            
-            # Initialize flags
-            if 'payment_status' not in df_sales.columns: df_sales['payment_status'] = 'Paid'
-            if 'paid_amount' not in df_sales.columns: df_sales['paid_amount'] = df_sales['total_amount']
-            if 'total_profit' not in df_sales.columns: df_sales['total_profit'] = 0.0
-
-            df_sales = df_sales.where(pd.notnull(df_sales), None)
-            
-            try:
-                # Clear existing restored sales to avoid duplicates
-                conn.execute(f"DELETE FROM sales WHERE owner_id = {ROOT_USER_ID}")
-                df_sales.to_sql('sales', conn, if_exists='append', index=False)
-                print(f"  Successfully restored {len(df_sales)} sales records.")
-            except Exception as e:
-                print(f"  Error restoring sales: {e}")
-                print(f"  Retrying without ID...")
-                try:
-                    df_sales.drop(columns=['id'], errors='ignore').to_sql('sales', conn, if_exists='append', index=False)
-                    print(f"  Successfully restored {len(df_sales)} sales records (IDs re-assigned).")
-                except Exception as e2:
-                    print(f"  Critical error for sales: {e2}")
-        else:
-            print("No sales export files found.")
+    if restore_sales(engine):
+        rebuild_rollup(engine, ROOT_USER_ID)
+        print("  A running server may show cached dashboard totals until its analytics cache expires (ANALYTICS_CACHE_TTL).")
 
-    conn.close()
+    engine.dispose()
     print("\nRestoration process finished.")
 
 if __name__ == "__main__":
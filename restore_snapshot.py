@@ -0,0 +1,43 @@
+import os
+import sys
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from backup_service import list_snapshots, restore_snapshot
+from services import rollup_service
+
+# Paths
+DB_PATH = 'backend/inventory.db'
+SNAPSHOT_DIR = 'C:/RetailInventoryData/exports/snapshots'
+
+# Disaster recovery: put back a database snapshot written with
+# BACKUP_MODE=snapshot (or both). Stop the server first.
+# Usage: python restore_snapshot.py [snapshot file]   (default: newest)
+
+def restore(snapshot=None):
+    if snapshot is None:
+        snapshots = list_snapshots(SNAPSHOT_DIR) if os.path.isdir(SNAPSHOT_DIR) else []
+        if not snapshots:
+            print(f"Error: No snapshots found in {SNAPSHOT_DIR}")
+            return
+        snapshot = snapshots[-1]
+
+    print(f"Restoring {DB_PATH} from {snapshot}...")
+    try:
+        restore_snapshot(snapshot, DB_PATH)
+    except Exception as e:
+        print(f"  Error restoring snapshot: {e}")
+        return
+    print(f"  Database restored. The previous database was kept as {DB_PATH}.pre-restore")
+
+    # The snapshot's rollup may predate it, or miss sales written outside the sales router
+    engine = create_engine(f"sqlite:///{DB_PATH}")
+    try:
+        with Session(engine) as db:
+            print(f"  Rebuilt {rollup_service.rebuild(db)} daily sales rollup rows.")
+    finally:
+        engine.dispose()
+
+if __name__ == "__main__":
+    restore(sys.argv[1] if len(sys.argv) > 1 else None)